@@ -1,8 +1,13 @@
 # Import required libraries
 import pygame
+import os
 import sys
 import chess
-import math
+
+from ai_worker import AIWorker
+from chess_engine import TIME_LIMIT_MS, TranspositionTable
+from chess_parallel import ParallelSearcher
+from chess_probing import ProbingSearcher
 
 # Initialize Pygame
 pygame.init()
@@ -13,6 +18,17 @@ SQUARE_SIZE = WIDTH // 8
 
 # Font for rendering chess pieces (Unicode characters)
 FONT = pygame.font.SysFont("segoeuisymbol", 48)
+STATUS_FONT = pygame.font.SysFont("arial", 24)
+
+# Event posted by the AI thread when its move is ready
+AI_MOVE_EVENT = pygame.USEREVENT + 1
+# Thinking time of the AI per move, in milliseconds
+AI_TIME_MS = TIME_LIMIT_MS
+# Processes searching each AI move; more than 1 uses the Lazy SMP search
+AI_WORKERS = 1
+# Optional Polyglot opening book and Syzygy tablebase directory; used if present
+BOOK_PATH = "book.bin"
+TABLEBASE_DIR = "syzygy"
 
 # Create the game window
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -30,42 +46,80 @@ symbols = {
     "R": "♖", "N": "♘", "B": "♗", "Q": "♕", "K": "♔", "P": "♙"
 }
 
-# Material values for each piece type
-piece_values = {
-    chess.PAWN: 1,
-    chess.KNIGHT: 3,
-    chess.BISHOP: 3,
-    chess.ROOK: 5,
-    chess.QUEEN: 9,
-    chess.KING: 0  # King has no material value (game ends if captured)
-}
+def square_rect(square):
+    """Screen rectangle of a chess square."""
+    return pygame.Rect(chess.square_file(square) * SQUARE_SIZE, (7 - chess.square_rank(square)) * SQUARE_SIZE,
+                       SQUARE_SIZE, SQUARE_SIZE)
 
-def draw_board(board, selected_square=None, legal_moves=[]):
-    """Draws the chessboard, pieces, selected square, and move hints."""
-    for row in range(8):
-        for col in range(8):
-            # Calculate square position and color
-            rect = pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
-            color = BROWN if (row + col) % 2 else WHITE_COLOR
-            pygame.draw.rect(screen, color, rect)
-
-            square = chess.square(col, 7 - row)
-
-            # Highlight selected square
-            if square == selected_square:
-                pygame.draw.rect(screen, HIGHLIGHT, rect, 4)
-            # Show dots for legal moves
-            elif square in legal_moves:
-                pygame.draw.circle(screen, MOVE_HINT, rect.center, 10)
-
-            # Draw chess pieces
+class BoardRenderer:
+    """
+    Draws the board from surfaces rendered once (the empty board and one
+    glyph per piece) and only redraws the squares that changed since the
+    last call, updating just those parts of the window.
+    """
+
+    def __init__(self):
+        # Empty board
+        self.background = pygame.Surface((WIDTH, HEIGHT))
+        for square in chess.SQUARES:
+            rect = square_rect(square)
+            color = BROWN if (rect.x // SQUARE_SIZE + rect.y // SQUARE_SIZE) % 2 else WHITE_COLOR
+            pygame.draw.rect(self.background, color, rect)
+
+        # Piece glyphs and the thinking banner
+        self.glyphs = {symbol: FONT.render(glyph, True, (0, 0, 0)) for symbol, glyph in symbols.items()}
+        self.status = STATUS_FONT.render("Computer is thinking...", True, (255, 255, 255), (0, 0, 0))
+        self.status_rect = self.status.get_rect(midtop=(WIDTH // 2, 4))
+
+        # What each square showed when last drawn, and whether the banner was up
+        self.drawn = {}
+        self.thinking = False
+
+    def invalidate(self):
+        """Redraw everything on the next draw, e.g. after the window was covered."""
+        self.drawn = {}
+
+    def draw_square(self, square, symbol, selected, hint):
+        rect = square_rect(square)
+        screen.blit(self.background, rect, rect)
+
+        # Highlight selected square
+        if selected:
+            pygame.draw.rect(screen, HIGHLIGHT, rect, 4)
+        # Show dots for legal moves
+        elif hint:
+            pygame.draw.circle(screen, MOVE_HINT, rect.center, 10)
+
+        # Draw chess pieces
+        if symbol:
+            glyph = self.glyphs[symbol]
+            screen.blit(glyph, glyph.get_rect(center=rect.center))
+        return rect
+
+    def draw(self, board, selected_square=None, legal_moves=(), thinking=False):
+        """Draws the pieces, selected square, move hints and the AI's thinking state."""
+        # Squares under the banner change when it appears or disappears
+        if thinking != self.thinking:
+            for square in chess.SQUARES:
+                if square_rect(square).colliderect(self.status_rect):
+                    self.drawn.pop(square, None)
+
+        dirty = []
+        for square in chess.SQUARES:
             piece = board.piece_at(square)
-            if piece:
-                text = FONT.render(symbols[piece.symbol()], True, (0, 0, 0))
-                text_rect = text.get_rect(center=rect.center)
-                screen.blit(text, text_rect)
+            state = (piece.symbol() if piece else None, square == selected_square, square in legal_moves)
+            if self.drawn.get(square) != state:
+                self.drawn[square] = state
+                dirty.append(self.draw_square(square, *state))
 
-    pygame.display.flip()
+        # Show that the AI is searching
+        if thinking and (thinking != self.thinking or self.status_rect.collidelist(dirty) != -1):
+            screen.blit(self.status, self.status_rect)
+            dirty.append(self.status_rect)
+        self.thinking = thinking
+
+        if dirty:
+            pygame.display.update(dirty)
 
 def get_square_under_mouse(pos):
     """Convert mouse (x, y) position to chess square index."""
@@ -74,67 +128,6 @@ def get_square_under_mouse(pos):
     row = y // SQUARE_SIZE
     return chess.square(col, 7 - row)
 
-def evaluate_board(board):
-    """
-    Simple board evaluation based on material balance.
-    Positive = white is better, negative = black is better.
-    """
-    if board.is_checkmate():
-        return -9999 if board.turn else 9999
-    elif board.is_stalemate() or board.is_insufficient_material():
-        return 0
-
-    score = 0
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece:
-            value = piece_values[piece.piece_type]
-            score += value if piece.color == chess.WHITE else -value
-    return score
-
-def minimax(board, depth, alpha, beta, maximizing):
-    """
-    Minimax algorithm with alpha-beta pruning.
-    Used by the AI to choose the best move.
-    """
-    if depth == 0 or board.is_game_over():
-        return evaluate_board(board), None
-
-    best_move = None
-
-    if maximizing:
-        max_eval = -math.inf
-        for move in board.legal_moves:
-            board.push(move)
-            eval, _ = minimax(board, depth - 1, alpha, beta, False)
-            board.pop()
-            if eval > max_eval:
-                max_eval = eval
-                best_move = move
-            alpha = max(alpha, eval)
-            if beta <= alpha:
-                break
-        return max_eval, best_move
-    else:
-        min_eval = math.inf
-        for move in board.legal_moves:
-            board.push(move)
-            eval, _ = minimax(board, depth - 1, alpha, beta, True)
-            board.pop()
-            if eval < min_eval:
-                min_eval = eval
-                best_move = move
-            beta = min(beta, eval)
-            if beta <= alpha:
-                break
-        return min_eval, best_move
-
-def ai_move(board):
-    """Triggers AI (black) to make a move using minimax."""
-    _, move = minimax(board, 2, -math.inf, math.inf, False)  # depth 2 for faster play
-    if move:
-        board.push(move)
-
 def promote_pawn(board, move):
     """Handles pawn promotion logic when a pawn reaches last rank."""
     if board.is_legal(move):
@@ -176,15 +169,26 @@ def main():
     """Main game loop"""
     board = chess.Board()
     selected_square = None
+    legal_moves = []
     running = True
+    renderer = BoardRenderer()
+    # Sleep until one of these arrives instead of polling; mouse motion
+    # and other events never wake the loop
+    pygame.event.set_allowed(None)
+    pygame.event.set_allowed([pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.WINDOWEXPOSED, AI_MOVE_EVENT])
+    # One transposition table per game, so each search reuses the last one
+    searcher = ParallelSearcher(AI_WORKERS) if AI_WORKERS > 1 else None
+    # Kept for the whole game; the parallel workers can only share theirs
+    table = searcher.table if searcher is not None else TranspositionTable()
+    # Book and tablebase moves are played without searching
+    prober = ProbingSearcher(BOOK_PATH if os.path.isfile(BOOK_PATH) else None,
+                             TABLEBASE_DIR if os.path.isdir(TABLEBASE_DIR) else None, searcher)
+    # The AI searches a copy of the board on a background thread and posts
+    # AI_MOVE_EVENT when done, so the window keeps handling events
+    worker = AIWorker(notify=lambda: pygame.event.post(pygame.event.Event(AI_MOVE_EVENT)))
 
     while running:
-        # Highlight legal moves for selected piece
-        legal_moves = []
-        if selected_square is not None:
-            legal_moves = [move.to_square for move in board.legal_moves if move.from_square == selected_square]
-
-        draw_board(board, selected_square, legal_moves)
+        renderer.draw(board, selected_square, legal_moves, worker.busy)
 
         # End game if over
         if board.is_game_over():
@@ -192,11 +196,26 @@ def main():
             running = False
             continue
 
-        # Handle events
-        for event in pygame.event.get():
+        # AI plays automatically after human
+        if board.turn == chess.BLACK and not worker.busy:
+            worker.start(prober.get_computer_move, board.copy(), table, AI_TIME_MS)
+            continue
+
+        # Block until something happens, then handle everything queued
+        for event in [pygame.event.wait()] + pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
+            # Window uncovered: its contents must be drawn again
+            elif event.type == pygame.WINDOWEXPOSED:
+                renderer.invalidate()
+
+            # AI move finished on the worker thread
+            elif event.type == AI_MOVE_EVENT:
+                move = worker.poll()
+                if move and board.turn == chess.BLACK:
+                    board.push(move)
+
             # Handle user click on board
             elif event.type == pygame.MOUSEBUTTONDOWN and board.turn == chess.WHITE:
                 square = get_square_under_mouse(pygame.mouse.get_pos())
@@ -211,14 +230,17 @@ def main():
                         selected_square = None
                     else:
                         selected_square = None
+                    legal_moves = []
                 elif board.piece_at(square) and board.piece_at(square).color == chess.WHITE:
                     selected_square = square
-
-        # AI plays automatically after human
-        if board.turn == chess.BLACK and not board.is_game_over():
-            pygame.time.wait(300)
-            ai_move(board)
-
+                    # Highlight legal moves for selected piece
+                    legal_moves = [move.to_square for move in board.legal_moves if move.from_square == selected_square]
+
+    worker.cancel()
+    print(f"Computer: {prober.stats.report(AI_TIME_MS)}")
+    prober.close()
+    if searcher is not None:
+        searcher.close()
     pygame.quit()
     sys.exit()
 
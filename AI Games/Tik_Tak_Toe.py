@@ -1,30 +1,46 @@
 # Import necessary libraries
+import argparse
 import tkinter as tk
 from tkinter import messagebox
-import math
-import random
+
+from ai_worker import AIWorker
+from tic_tac_toe_engine import TicTacToeGame
+
+TITLE = "Tic-Tac-Toe (You: X | Computer: O)"
+# How often the UI checks for the computer's move, in milliseconds
+POLL_MS = 50
 
 
 class TicTacToe:
-    def __init__(self, root):
-        """Initialize the Tic-Tac-Toe game with the main window"""
+    def __init__(self, root, rows=3, cols=3, k=3):
+        """
+        Initialize the Tic-Tac-Toe game with the main window.
+        Args:
+            root (tk.Tk): Main window.
+            rows, cols (int): Board size.
+            k (int): Marks in a row needed to win.
+        """
         self.root = root
-        self.root.title("Tic-Tac-Toe (You: X | Computer: O)")
+        self.root.title(TITLE)
 
-        # Game board: 9 spaces initialized as empty
-        self.board = [" " for _ in range(9)]
+        # Game state and AI, independent of the UI
+        self.game = TicTacToeGame(rows=rows, cols=cols, k=k)
+        # The computer searches on a background thread
+        self.worker = AIWorker()
+        self.computer_turn = False
         # List to hold all button references
         self.buttons = []
         # Create the board UI
         self.create_board()
 
         # Player and computer symbols
-        self.player = "X"
-        self.computer = "O"
+        self.player = self.game.player
+        self.computer = self.game.computer
 
     def create_board(self):
-        """Creates the 3x3 grid of buttons for the game"""
-        for i in range(9):
+        """Creates the grid of buttons for the game"""
+        cols = self.game.cols
+        for i in range(self.game.size):
             button = tk.Button(
                 self.root,
                 text=" ",                     # Button starts empty
@@ -33,7 +49,7 @@ class TicTacToe:
                 width=6,
                 command=lambda i=i: self.on_click(i),  # Link each button to on_click
             )
-            button.grid(row=i // 3, column=i % 3)  # Place in grid
+            button.grid(row=i // cols, column=i % cols)  # Place in grid
             self.buttons.append(button)  # Store reference
 
     def on_click(self, index):
@@ -42,134 +58,84 @@ class TicTacToe:
         Args:
             index (int): Index of the button clicked.
         """
-        # Allow move only if cell is empty
-        if self.board[index] == " ":
+        # Allow move only if cell is empty and the computer is not playing
+        if self.game.board[index] == " " and not self.computer_turn:
             self.make_move(index, self.player)
 
             # Check if player wins after the move
-            if self.check_winner(self.player):
+            if self.game.check_winner(self.player):
                 messagebox.showinfo("Game Over", "You win!")
                 self.reset_board()
                 return
             # Check for draw
-            elif self.is_draw():
+            elif self.game.is_draw():
                 messagebox.showinfo("Game Over", "It's a draw!")
                 self.reset_board()
                 return
 
             # Delay before computer plays
+            self.computer_turn = True
             self.root.after(500, self.computer_move)
 
     def make_move(self, index, player):
         """
-        Make a move for the given player at the given index.
+        Make a move for the given player and show it on the board.
         Args:
             index (int): Position to play.
             player (str): 'X' for player, 'O' for computer.
         """
-        self.board[index] = player
+        self.game.make_move(index, player)
         self.buttons[index]["text"] = player
         self.buttons[index]["state"] = "disabled"
 
-    def is_draw(self):
-        """Check if the board is full and there's no winner (draw)"""
-        return " " not in self.board
-
-    def check_winner(self, player):
-        """
-        Check if the specified player has won.
-        Args:
-            player (str): 'X' or 'O'
-        Returns:
-            bool: True if the player wins
-        """
-        # All possible winning lines (rows, cols, diagonals)
-        win_combinations = [
-            [0, 1, 2], [3, 4, 5], [6, 7, 8],  # Rows
-            [0, 3, 6], [1, 4, 7], [2, 5, 8],  # Columns
-            [0, 4, 8], [2, 4, 6]              # Diagonals
-        ]
-        return any(all(self.board[i] == player for i in combo) for combo in win_combinations)
-
-    def available_moves(self):
-        """Return a list of indices for empty cells (valid moves)"""
-        return [i for i, spot in enumerate(self.board) if spot == " "]
-
     def computer_move(self):
-        """
-        Computer's turn to play:
-        - 30% chance to play a random move (makes it beatable).
-        - 70% chance to use Minimax for best move.
-        """
-        if random.random() < 0.3:
-            # Make a random move (simulate imperfect AI)
-            move = random.choice(self.available_moves())
-        else:
-            # Use Minimax to find the best move
-            best_score = -math.inf
-            best_move = None
-            for move in self.available_moves():
-                self.board[move] = self.computer
-                score = self.minimax(0, False)
-                self.board[move] = " "
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-            move = best_move
-
-        # Make the chosen move
+        """Start the computer's search without blocking the window"""
+        self.root.title("Computer is thinking...")
+        self.worker.start(self.game.computer_choice)
+        self.root.after(POLL_MS, self.check_computer_move)
+
+    def check_computer_move(self):
+        """Play the computer's move once the background search has finished"""
+        move = self.worker.poll()
+        if move is None:
+            if self.worker.busy:
+                self.root.after(POLL_MS, self.check_computer_move)
+            return
+
+        self.root.title(TITLE)
+        self.computer_turn = False
         self.make_move(move, self.computer)
 
         # Check game result after computer's move
-        if self.check_winner(self.computer):
+        if self.game.check_winner(self.computer):
             messagebox.showinfo("Game Over", "Computer wins!")
             self.reset_board()
-        elif self.is_draw():
+        elif self.game.is_draw():
             messagebox.showinfo("Game Over", "It's a draw!")
             self.reset_board()
 
-    def minimax(self, depth, is_maximizing):
-        """
-        Minimax algorithm: evaluates the best move recursively.
-        Args:
-            depth (int): Recursion depth.
-            is_maximizing (bool): True if computer's turn, False if player's.
-        Returns:
-            int: Score for the current board state.
-        """
-        if self.check_winner(self.computer):
-            return 1
-        elif self.check_winner(self.player):
-            return -1
-        elif self.is_draw():
-            return 0
-
-        if is_maximizing:
-            best_score = -math.inf
-            for move in self.available_moves():
-                self.board[move] = self.computer
-                score = self.minimax(depth + 1, False)
-                self.board[move] = " "
-                best_score = max(score, best_score)
-            return best_score
-        else:
-            best_score = math.inf
-            for move in self.available_moves():
-                self.board[move] = self.player
-                score = self.minimax(depth + 1, True)
-                self.board[move] = " "
-                best_score = min(score, best_score)
-            return best_score
-
     def reset_board(self):
         """Reset the board and buttons for a new round"""
-        self.board = [" " for _ in range(9)]
+        self.worker.cancel()
+        self.computer_turn = False
+        self.root.title(TITLE)
+        self.game.reset()
         for btn in self.buttons:
             btn.config(text=" ", state="normal")
 
 
 # Start the game
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play k-in-a-row on an m x n board against the computer")
+    parser.add_argument("--rows", type=int, default=3, help="board height")
+    parser.add_argument("--cols", type=int, default=3, help="board width")
+    parser.add_argument("--k", type=int, default=3, help="marks in a row needed to win")
+    args = parser.parse_args()
+    if args.rows < 1 or args.cols < 1:
+        parser.error("--rows and --cols must be at least 1")
+    if not 1 <= args.k <= max(args.rows, args.cols):
+        parser.error("--k must be between 1 and the longer side of the board")
+
     root = tk.Tk()
-    game = TicTacToe(root)
+    game = TicTacToe(root, args.rows, args.cols, args.k)
     root.mainloop()
@@ -0,0 +1,73 @@
+# Background AI search shared by the tkinter and pygame games, so a long
+# search never blocks the UI event loop
+import queue
+import threading
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search when its cancel event is set"""
+
+
+class AIWorker:
+    def __init__(self, notify=None):
+        """
+        Run one AI search at a time on a daemon thread.
+        Args:
+            notify (callable): Called from the worker thread when a result is
+                ready, e.g. to post an event that wakes the UI loop.
+        """
+        self.notify = notify
+        self.results = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.job = 0
+        self.busy = False
+
+    def start(self, search, *args):
+        """
+        Cancel any running search and start search(*args, cancel_event=...).
+        The search should raise SearchCancelled (or return early) once the
+        event is set.
+        """
+        self.cancel()
+        self.job += 1
+        self.cancel_event = threading.Event()
+        self.busy = True
+        thread = threading.Thread(target=self._run, args=(self.job, self.cancel_event, search, args), daemon=True)
+        thread.start()
+
+    def _run(self, job, cancel_event, search, args):
+        try:
+            result = (search(*args, cancel_event=cancel_event), None)
+        except SearchCancelled:
+            return
+        except Exception as error:
+            result = (None, error)
+        if cancel_event.is_set():
+            return
+        self.results.put((job, result))
+        if self.notify is not None:
+            self.notify()
+
+    def cancel(self):
+        """Stop the running search; its result will be discarded"""
+        self.cancel_event.set()
+        self.busy = False
+
+    def poll(self):
+        """
+        Collect the result of the current search without blocking.
+        Returns:
+            The search result, or None while it is still running. Errors
+            raised by the search are re-raised here, on the UI thread.
+        """
+        while True:
+            try:
+                job, (result, error) = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            # Results of cancelled or replaced searches are stale
+            if job == self.job and self.busy:
+                self.busy = False
+                if error is not None:
+                    raise error
+                return result
@@ -0,0 +1,882 @@
+# Chess engine: evaluation and search without any pygame dependency, so it
+# can be imported quickly and run without a display
+import argparse
+import math
+import random
+import time
+
+import chess
+import chess.polyglot
+
+from ai_worker import SearchCancelled
+from search_profile import EVALUATION, MOVE_GENERATION, TERMINAL, SearchProfile, write_chrome_trace
+
+# Score of a checkmate; mates found n plies into the search score
+# MATE_SCORE - n so shorter mates are preferred
+MATE_SCORE = 100000
+MATE_THRESHOLD = MATE_SCORE - 1000
+# Score of a tablebase win n plies into the search: TABLEBASE_WIN - n
+TABLEBASE_WIN = 20000
+
+# Search configuration
+TIME_LIMIT_MS = 300  # Per-move budget, the delay the game used to wait before a depth-2 search
+MAX_DEPTH = 64
+TABLE_SIZE = 1 << 20  # Transposition table entries
+CHECK_INTERVAL = 255  # Nodes between deadline checks, minus one (a bit mask)
+
+DELTA_MARGIN = 200  # Quiescence skips captures that cannot lift the score this close to alpha
+KILLER_SLOTS = 2  # Quiet moves remembered per ply for killer ordering
+ORDERING_DEPTH = 3  # Default depth of the node count report
+
+# Transposition table entry flags
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Move ordering tiers; within the capture tier moves sort by MVV-LVA
+TABLE_MOVE_ORDER = 1 << 30
+CAPTURE_ORDER = 1 << 20
+KILLER_ORDER = 1 << 19
+
+# Fixed test positions for comparing node counts between search versions
+TEST_POSITIONS = [
+    ("start", chess.STARTING_FEN),
+    ("italian", "r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"),
+    ("queen's gambit", "rnbqkb1r/ppp2ppp/4pn2/3p4/2PP4/2N5/PP2PPPP/R1BQKBNR w KQkq - 2 4"),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"),
+    ("tactics", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"),
+    ("rook endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"),
+]
+
+# Material values in centipawns
+PIECE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 320,
+    chess.BISHOP: 330,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 0
+}
+
+# Piece-square bonuses in centipawns for white, laid out as the board is
+# drawn: rank 8 first, a-file first. Black uses the same tables mirrored
+PIECE_SQUARE_TABLES = {
+    chess.PAWN: [
+        0,   0,   0,   0,   0,   0,   0,   0,
+        50,  50,  50,  50,  50,  50,  50,  50,
+        10,  10,  20,  30,  30,  20,  10,  10,
+        5,   5,  10,  25,  25,  10,   5,   5,
+        0,   0,   0,  20,  20,   0,   0,   0,
+        5,  -5, -10,   0,   0, -10,  -5,   5,
+        5,  10,  10, -20, -20,  10,  10,   5,
+        0,   0,   0,   0,   0,   0,   0,   0,
+    ],
+    chess.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    chess.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    chess.ROOK: [
+        0,   0,   0,   0,   0,   0,   0,   0,
+        5,  10,  10,  10,  10,  10,  10,   5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        0,   0,   0,   5,   5,   0,   0,   0,
+    ],
+    chess.QUEEN: [
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+        -5,   0,   5,   5,   5,   5,   0,  -5,
+        0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+    ],
+    chess.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20,  20,   0,   0,   0,   0,  20,  20,
+        20,  30,  10,   0,   0,  10,  30,  20,
+    ],
+}
+
+def build_square_scores():
+    """
+    Combine material and piece-square bonuses into one lookup.
+    Returns:
+        dict: SQUARE_SCORES[color][piece_type][square], the signed score
+            (positive for white) a piece adds to the evaluation.
+    """
+    scores = {chess.WHITE: {}, chess.BLACK: {}}
+    for piece_type, table in PIECE_SQUARE_TABLES.items():
+        value = PIECE_VALUES[piece_type]
+        # White reads the table flipped vertically (a1 is its bottom-left entry)
+        scores[chess.WHITE][piece_type] = [value + table[square ^ 56] for square in chess.SQUARES]
+        scores[chess.BLACK][piece_type] = [-(value + table[square]) for square in chess.SQUARES]
+    return scores
+
+SQUARE_SCORES = build_square_scores()
+
+def build_piece_keys():
+    """
+    Polyglot Zobrist keys of every piece on every square.
+    Returns:
+        dict: PIECE_KEYS[color][piece_type][square], the key chess.polyglot
+            XORs into a position's hash for that piece.
+    """
+    keys = {chess.WHITE: {}, chess.BLACK: {}}
+    for color in chess.COLORS:
+        for piece_type in chess.PIECE_TYPES:
+            # Polyglot orders pieces as black pawn, white pawn, black knight, ...
+            offset = 64 * ((piece_type - 1) * 2 + int(color))
+            keys[color][piece_type] = chess.polyglot.POLYGLOT_RANDOM_ARRAY[offset:offset + 64]
+    return keys
+
+PIECE_KEYS = build_piece_keys()
+HASHER = chess.polyglot.ZobristHasher(chess.polyglot.POLYGLOT_RANDOM_ARRAY)
+
+def state_key(board):
+    """Polyglot hash of the castling rights, en passant file and side to move"""
+    return HASHER.hash_castling(board) ^ HASHER.hash_ep_square(board) ^ HASHER.hash_turn(board)
+
+# Material values in pawns used by the original evaluation
+piece_values = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+    chess.KING: 0  # King has no material value (game ends if captured)
+}
+
+def evaluate_board(board):
+    """
+    Simple board evaluation based on material balance.
+    Positive = white is better, negative = black is better.
+    This is the original evaluation, rescanning all 64 squares; it is kept
+    as the baseline of the benchmark below.
+    """
+    if board.is_checkmate():
+        return -9999 if board.turn else 9999
+    elif board.is_stalemate() or board.is_insufficient_material():
+        return 0
+
+    score = 0
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+        if piece:
+            value = piece_values[piece.piece_type]
+            score += value if piece.color == chess.WHITE else -value
+    return score
+
+def evaluate(board):
+    """
+    Material and piece-square score computed from the piece bitboards.
+    Args:
+        board (chess.Board): Position to score.
+    Returns:
+        int: Centipawns, positive if white is better.
+    """
+    score = 0
+    for color in chess.COLORS:
+        for piece_type, square_scores in SQUARE_SCORES[color].items():
+            for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                score += square_scores[square]
+    return score
+
+def evaluate_terminal(board):
+    """
+    Score of a finished game.
+    Args:
+        board (chess.Board): Position where board.is_game_over() is true.
+    Returns:
+        int: -MATE_SCORE if white is checkmated, MATE_SCORE if black is,
+            0 for any draw.
+    """
+    if board.is_checkmate():
+        return -MATE_SCORE if board.turn == chess.WHITE else MATE_SCORE
+    return 0
+
+class Evaluator:
+    def __init__(self, board):
+        """
+        Keep the evaluate() score and the polyglot hash of a board up to
+        date while moves are pushed and popped, instead of rescanning the
+        board at every node. The board must only be changed through push
+        and pop.
+        Args:
+            board (chess.Board): Board to track; it is modified in place.
+        """
+        self.board = board
+        self.score = evaluate(board)
+        # Hash of the pieces alone; key adds castling, en passant and turn
+        self.piece_key = HASHER.hash_board(board)
+        self.key = self.piece_key ^ state_key(board)
+        self.deltas = []
+
+    def move_delta(self, move):
+        """
+        Change in score and piece hash caused by a move, computed before it
+        is played.
+        Args:
+            move (chess.Move): Legal move in the current position.
+        Returns:
+            tuple: (score after minus score before, XOR of the piece keys
+                that change).
+        """
+        if not move:
+            return 0, 0  # Null move
+
+        board = self.board
+        color = board.turn
+        own = SQUARE_SCORES[color]
+        own_keys = PIECE_KEYS[color]
+        piece_type = board.piece_type_at(move.from_square)
+        delta = -own[piece_type][move.from_square]
+        key_delta = own_keys[piece_type][move.from_square]
+
+        if board.is_castling(move):
+            rank = chess.square_rank(move.from_square)
+            if board.is_kingside_castling(move):
+                king_to, rook_from, rook_to = chess.square(6, rank), chess.square(7, rank), chess.square(5, rank)
+            else:
+                king_to, rook_from, rook_to = chess.square(2, rank), chess.square(0, rank), chess.square(3, rank)
+            rook, rook_keys = own[chess.ROOK], own_keys[chess.ROOK]
+            delta += own[chess.KING][king_to] - rook[rook_from] + rook[rook_to]
+            key_delta ^= own_keys[chess.KING][king_to] ^ rook_keys[rook_from] ^ rook_keys[rook_to]
+            return delta, key_delta
+
+        if board.is_en_passant(move):
+            captured_square = move.to_square - 8 if color == chess.WHITE else move.to_square + 8
+            delta -= SQUARE_SCORES[not color][chess.PAWN][captured_square]
+            key_delta ^= PIECE_KEYS[not color][chess.PAWN][captured_square]
+        else:
+            captured = board.piece_type_at(move.to_square)
+            if captured:
+                delta -= SQUARE_SCORES[not color][captured][move.to_square]
+                key_delta ^= PIECE_KEYS[not color][captured][move.to_square]
+
+        placed = move.promotion or piece_type
+        return delta + own[placed][move.to_square], key_delta ^ own_keys[placed][move.to_square]
+
+    def push(self, move):
+        """Play a move on the board and update the score and hash"""
+        delta, key_delta = self.move_delta(move)
+        self.deltas.append((delta, key_delta, self.key))
+        self.board.push(move)
+        self.score += delta
+        self.piece_key ^= key_delta
+        self.key = self.piece_key ^ state_key(self.board)
+
+    def pop(self):
+        """Take back the last move pushed through this evaluator"""
+        delta, key_delta, self.key = self.deltas.pop()
+        self.score -= delta
+        self.piece_key ^= key_delta
+        return self.board.pop()
+
+class SearchTimeout(Exception):
+    """Raised inside the search when its time budget runs out"""
+
+class TranspositionTable:
+    def __init__(self, size=TABLE_SIZE):
+        """
+        Fixed-size table of search results keyed by polyglot hash. A slot
+        keeps the deeper of two entries, unless the stored one is left
+        over from an earlier search, so the table never grows and stale
+        deep entries do not block it.
+        Args:
+            size (int): Number of slots.
+        """
+        self.size = size
+        self.entries = [None] * size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Mark the entries stored so far as belonging to earlier searches"""
+        self.generation += 1
+
+    def lookup(self, key):
+        """
+        Returns:
+            tuple: The (key, depth, value, flag, move, generation) entry of
+                a key, or None.
+        """
+        entry = self.entries[key % self.size]
+        if entry is None or entry[0] != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, value, flag, move):
+        """Store a result, replacing a shallower or older entry of its slot"""
+        slot = key % self.size
+        current = self.entries[slot]
+        self.stores += 1
+        if current is None or current[0] == key or current[5] != self.generation or depth >= current[1]:
+            self.entries[slot] = (key, depth, value, flag, move, self.generation)
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.hits = self.misses = self.stores = 0
+
+    def stats(self):
+        """Counters for sizing the table"""
+        probes = self.hits + self.misses
+        used = sum(entry is not None for entry in self.entries)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "fill": used / self.size,
+        }
+
+def score_to_table(score, ply):
+    """Mate scores are stored relative to the node, not to the root"""
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+def score_from_table(score, ply):
+    """Inverse of score_to_table"""
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+class SearchContext:
+    def __init__(self, table=None, deadline=None, cancel_event=None,
+                 mvv_lva=True, killers=True, history=True, quiescence=True, tablebase=None, profile=None):
+        """
+        State shared by every node of one search. The flags switch the
+        move ordering heuristics and the quiescence search off for the
+        node count report.
+        Args:
+            table (TranspositionTable): Table to probe and fill, or None.
+            deadline (float): time.perf_counter() value to stop at, or None.
+            cancel_event (threading.Event): Stops the search once set.
+            tablebase: Endgame tablebase with max_pieces and probe_wdl(board),
+                such as chess_probing.Tablebases, or None.
+            profile (SearchProfile): Collects search statistics, or None.
+        """
+        self.table = table
+        self.profile = profile
+        self.deadline = deadline
+        self.cancel_event = cancel_event
+        self.tablebase = tablebase
+        self.use_mvv_lva = mvv_lva
+        self.use_killers = killers
+        self.use_history = history
+        self.use_quiescence = quiescence
+        self.killers = [[] for _ in range(MAX_DEPTH + 1)]
+        # History scores indexed by [color][from_square * 64 + to_square]
+        self.history = [[0] * 4096 for _ in chess.COLORS]
+        self.nodes = 0
+        self.quiescence_nodes = 0
+
+    def check(self):
+        """Raise SearchCancelled or SearchTimeout when the search must stop"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise SearchCancelled()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+
+    def move_order(self, board, move, table_move, killers, history):
+        """Sort key of a move; larger is searched first"""
+        if move == table_move:
+            return TABLE_MOVE_ORDER
+        if self.use_mvv_lva:
+            if board.is_capture(move):
+                # Most valuable victim, then least valuable attacker; en passant takes a pawn
+                victim = board.piece_type_at(move.to_square) or chess.PAWN
+                return CAPTURE_ORDER + 10 * (victim + (move.promotion or 0)) - board.piece_type_at(move.from_square)
+            if move.promotion:
+                return CAPTURE_ORDER + 10 * move.promotion
+        if move in killers:
+            return KILLER_ORDER - killers.index(move)
+        return history[move.from_square * 64 + move.to_square]
+
+    def order_moves(self, board, moves, table_move, ply):
+        """
+        Order moves: table (principal variation) move, captures and
+        promotions by MVV-LVA, killers of this ply, then quiet moves by
+        history score. Disabled heuristics keep generator order.
+        """
+        killers = self.killers[ply] if self.use_killers else ()
+        history = self.history[board.turn]
+        moves.sort(key=lambda move: -self.move_order(board, move, table_move, killers, history))
+        return moves
+
+    def record_cutoff(self, board, move, ply, depth):
+        """Remember a quiet move that caused a beta cutoff"""
+        if board.is_capture(move) or move.promotion:
+            return
+        if self.use_killers:
+            killers = self.killers[ply]
+            if move not in killers:
+                killers.insert(0, move)
+                del killers[KILLER_SLOTS:]
+        if self.use_history:
+            self.history[board.turn][move.from_square * 64 + move.to_square] += depth * depth
+
+class SearchStats:
+    def __init__(self):
+        """Node counts of an iterative deepening search, one entry per completed depth"""
+        self.iteration_nodes = []
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.depth = 0
+        self.elapsed = 0.0
+
+    def branching_factor(self):
+        """Nodes of the deepest iteration over nodes of the one before it"""
+        if len(self.iteration_nodes) < 2:
+            return 0.0
+        return self.iteration_nodes[-1] / self.iteration_nodes[-2]
+
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+def tablebase_score(wdl, ply):
+    """Search score of a tablebase result; wins and losses under the 50-move rule count as draws"""
+    if wdl == 2:
+        return TABLEBASE_WIN - ply
+    if wdl == -2:
+        return -(TABLEBASE_WIN - ply)
+    return 0
+
+def static_score(evaluator):
+    """Evaluator score from the side to move's point of view"""
+    return evaluator.score if evaluator.board.turn == chess.WHITE else -evaluator.score
+
+def is_rule_draw(board):
+    """Draw by the 50-move rule, insufficient material or a position repeated inside the search"""
+    return board.halfmove_clock >= 100 or board.is_insufficient_material() or board.is_repetition(2)
+
+def noisy_moves(board, margin):
+    """
+    Moves of the quiescence search: captures of a piece worth more than
+    margin, every capture that promotes, and promotions to an empty square.
+    """
+    moves = [move for move in board.generate_legal_captures()
+             if move.promotion or PIECE_VALUES[board.piece_type_at(move.to_square) or chess.PAWN] > margin]
+    promoting = board.pawns & board.occupied_co[board.turn] & (chess.BB_RANK_7 if board.turn == chess.WHITE else chess.BB_RANK_2)
+    if promoting:
+        moves.extend(board.generate_legal_moves(promoting, ~board.occupied))
+    return moves
+
+def quiescence(evaluator, alpha, beta, context, ply):
+    """
+    Search captures and promotions until the position is quiet, so the
+    main search never stops halfway through an exchange. The side to move
+    may stand pat on the static score instead of capturing, and captures
+    that cannot raise it to alpha even with DELTA_MARGIN to spare are
+    skipped; in check, every evasion is searched and no legal move means
+    mate.
+    Returns:
+        int: Score for the side to move.
+    """
+    board = evaluator.board
+    context.nodes += 1
+    context.quiescence_nodes += 1
+    if context.nodes & CHECK_INTERVAL == 0:
+        context.check()
+    profile = context.profile
+    if profile is not None:
+        profile.node(ply)
+
+    if board.is_check():
+        moves = list(board.legal_moves) if profile is None else profile.timed(MOVE_GENERATION, list, board.legal_moves)
+        if not moves:
+            return -(MATE_SCORE - ply)
+        best_value = -math.inf
+    else:
+        best_value = static_score(evaluator) if profile is None else profile.timed(EVALUATION, static_score, evaluator)
+        if best_value >= beta:
+            return best_value
+        if best_value > alpha:
+            alpha = best_value
+        # Captures that can still matter
+        margin = alpha - best_value - DELTA_MARGIN
+        moves = noisy_moves(board, margin) if profile is None else profile.timed(MOVE_GENERATION, noisy_moves, board, margin)
+
+    if profile is None:
+        ordered = context.order_moves(board, moves, None, ply)
+    else:
+        ordered = profile.timed(MOVE_GENERATION, context.order_moves, board, moves, None, ply)
+    for move in ordered:
+        evaluator.push(move)
+        value = -quiescence(evaluator, -beta, -alpha, context, ply + 1)
+        evaluator.pop()
+        if value > best_value:
+            best_value = value
+        if value > alpha:
+            alpha = value
+        if alpha >= beta:
+            if profile is not None:
+                profile.cutoff(move == ordered[0])
+            break
+    return best_value
+
+def negamax(evaluator, depth, alpha, beta, context, ply=0):
+    """
+    Alpha-beta negamax search with a transposition table.
+    Args:
+        evaluator (Evaluator): Tracks the board being searched.
+        depth (int): Remaining depth in plies.
+        alpha, beta: Search window, from the side to move's point of view.
+        context (SearchContext): Table, time limit and node counter.
+        ply (int): Distance from the root.
+    Returns:
+        tuple: (score for the side to move, best move or None).
+    """
+    board = evaluator.board
+    context.nodes += 1
+    if context.nodes & CHECK_INTERVAL == 0:
+        context.check()
+    profile = context.profile
+    if profile is not None:
+        profile.node(ply)
+
+    # Draws by rule; a position repeated once inside the search is a draw
+    if ply > 0 and (is_rule_draw(board) if profile is None else profile.timed(TERMINAL, is_rule_draw, board)):
+        return 0, None
+
+    # Small endgames are looked up instead of searched
+    tablebase = context.tablebase
+    if ply > 0 and tablebase is not None and chess.popcount(board.occupied) <= tablebase.max_pieces:
+        wdl = tablebase.probe_wdl(board) if profile is None else profile.timed(TERMINAL, tablebase.probe_wdl, board)
+        if wdl is not None:
+            return tablebase_score(wdl, ply), None
+
+    if depth <= 0:
+        if context.use_quiescence:
+            return quiescence(evaluator, alpha, beta, context, ply), None
+        if profile is None:
+            if not any(board.generate_legal_moves()):
+                return (-(MATE_SCORE - ply) if board.is_check() else 0), None
+            return static_score(evaluator), None
+        if not profile.timed(TERMINAL, any, board.generate_legal_moves()):
+            return (-(MATE_SCORE - ply) if board.is_check() else 0), None
+        return profile.timed(EVALUATION, static_score, evaluator), None
+
+    original_alpha = alpha
+    key = evaluator.key
+    table_move = None
+    if context.table is not None:
+        entry = context.table.lookup(key)
+        if entry is not None:
+            table_move = entry[4]
+            # Never cut at the root, which must return a move
+            if entry[1] >= depth and ply > 0:
+                value = score_from_table(entry[2], ply)
+                if entry[3] == EXACT:
+                    return value, table_move
+                if entry[3] == LOWER_BOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value, table_move
+
+    if profile is None:
+        moves = list(board.legal_moves)
+    else:
+        moves = profile.timed(MOVE_GENERATION, list, board.legal_moves)
+    if not moves:
+        return (-(MATE_SCORE - ply) if board.is_check() else 0), None
+
+    if profile is None:
+        ordered = context.order_moves(board, moves, table_move, ply)
+    else:
+        ordered = profile.timed(MOVE_GENERATION, context.order_moves, board, moves, table_move, ply)
+    best_value, best_move = -math.inf, None
+    for move in ordered:
+        evaluator.push(move)
+        value = -negamax(evaluator, depth - 1, -beta, -alpha, context, ply + 1)[0]
+        evaluator.pop()
+        if value > best_value:
+            best_value, best_move = value, move
+        if value > alpha:
+            alpha = value
+        if alpha >= beta:
+            context.record_cutoff(board, move, ply, depth)
+            if profile is not None:
+                profile.cutoff(move == ordered[0])
+            break
+
+    if context.table is not None:
+        if best_value <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_value >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        context.table.store(key, depth, score_to_table(best_value, ply), flag, best_move)
+    return best_value, best_move
+
+def iterative_deepening(board, time_limit_ms=TIME_LIMIT_MS, table=None, max_depth=MAX_DEPTH, cancel_event=None, stats=None,
+                        start_depth=1, on_iteration=None, tablebase=None, profile=None):
+    """
+    Search depth 1, 2, 3, ... until the time budget runs out. Each
+    iteration starts from the table move of the one before, so the
+    principal variation is searched first. The first iteration always
+    completes.
+    Args:
+        board (chess.Board): Position to search; restored afterwards.
+        time_limit_ms (float): Time budget in milliseconds.
+        table (TranspositionTable): Table to reuse across moves of a game.
+        max_depth (int): Deepest iteration.
+        cancel_event (threading.Event): Stops the search with SearchCancelled.
+        stats (SearchStats): Filled with node counts and timing.
+        start_depth (int): First iteration, for helpers of a parallel search.
+        on_iteration (callable): Called as on_iteration(move, value, depth,
+            stats) after each completed iteration, with the board restored.
+        tablebase: Endgame tablebase probed inside the search, or None.
+        profile (SearchProfile): Gets the statistics and principal
+            variation of every completed iteration.
+    Returns:
+        tuple: (best move, score for the side to move, completed depth).
+    """
+    if table is None:
+        table = TranspositionTable()
+    if stats is None:
+        stats = SearchStats()
+    table.new_search()
+    start = time.perf_counter()
+    deadline = start + time_limit_ms / 1000
+    context = SearchContext(table, cancel_event=cancel_event, tablebase=tablebase, profile=profile)
+    evaluator = Evaluator(board)
+    best_move, best_value, completed_depth = None, 0, 0
+    # A depth-0 iteration would only evaluate the root and find no move
+    max_depth = max(max_depth, 1)
+
+    for depth in range(min(start_depth, max_depth), max_depth + 1):
+        nodes_before = context.nodes
+        try:
+            value, move = negamax(evaluator, depth, -math.inf, math.inf, context)
+        except (SearchTimeout, SearchCancelled) as stop:
+            while evaluator.deltas:
+                evaluator.pop()
+            if isinstance(stop, SearchCancelled):
+                raise
+            break
+        finally:
+            stats.nodes = context.nodes
+            stats.quiescence_nodes = context.quiescence_nodes
+            stats.elapsed = time.perf_counter() - start
+        context.deadline = deadline
+        stats.iteration_nodes.append(context.nodes - nodes_before)
+        stats.depth = depth
+        best_move, best_value, completed_depth = move, value, depth
+        if profile is not None:
+            profile.iteration(depth, value, [pv_move.uci() for pv_move in principal_variation(board, table, depth)])
+        if on_iteration is not None:
+            on_iteration(move, value, depth, stats)
+        # A forced mate will not change with more depth
+        if move is None or abs(value) >= MATE_THRESHOLD or time.perf_counter() >= deadline:
+            break
+
+    if profile is not None:
+        profile.finish()
+    return best_move, best_value, completed_depth
+
+def principal_variation(board, table, max_length=MAX_DEPTH):
+    """
+    Expected line of play, following table moves from a position.
+    Returns:
+        list: chess.Move objects, possibly empty.
+    """
+    evaluator = Evaluator(board)
+    line = []
+    while len(line) < max_length:
+        entry = table.lookup(evaluator.key)
+        if entry is None or entry[4] is None or entry[4] not in board.legal_moves:
+            break
+        line.append(entry[4])
+        evaluator.push(entry[4])
+        if board.is_repetition(2):
+            break
+    while evaluator.deltas:
+        evaluator.pop()
+    return line
+
+def get_computer_move(board, table=None, time_limit_ms=TIME_LIMIT_MS, cancel_event=None):
+    """
+    Best move for the side to move within a time budget; pass the same
+    table on every call of a game so earlier searches are reused.
+    """
+    move, _, _ = iterative_deepening(board, time_limit_ms, table, cancel_event=cancel_event)
+    return move
+
+def ordering_report(depth=ORDERING_DEPTH, positions=TEST_POSITIONS):
+    """
+    Nodes needed for fixed-depth searches of the test positions with each
+    search improvement switched on in turn.
+    Args:
+        depth (int): Iterative deepening depth of every search.
+        positions (list): (name, fen) pairs.
+    Returns:
+        list: (label, nodes, quiescence nodes, seconds) rows.
+    """
+    configurations = [
+        ("alpha-beta", False, dict(mvv_lva=False, killers=False, history=False, quiescence=False)),
+        ("+ table move", True, dict(mvv_lva=False, killers=False, history=False, quiescence=False)),
+        ("+ MVV-LVA", True, dict(mvv_lva=True, killers=False, history=False, quiescence=False)),
+        ("+ killers", True, dict(mvv_lva=True, killers=True, history=False, quiescence=False)),
+        ("+ history", True, dict(mvv_lva=True, killers=True, history=True, quiescence=False)),
+        ("+ quiescence", True, dict(mvv_lva=True, killers=True, history=True, quiescence=True)),
+    ]
+    rows = []
+    for label, use_table, options in configurations:
+        nodes = quiescence_nodes = 0
+        start = time.perf_counter()
+        for _, fen in positions:
+            context = SearchContext(TranspositionTable() if use_table else None, **options)
+            evaluator = Evaluator(chess.Board(fen))
+            for iteration in range(1, depth + 1):
+                negamax(evaluator, iteration, -math.inf, math.inf, context)
+            nodes += context.nodes
+            quiescence_nodes += context.quiescence_nodes
+        rows.append((label, nodes, quiescence_nodes, time.perf_counter() - start))
+    return rows
+
+def random_positions(count, seed=None, max_plies=80):
+    """
+    Positions reached by random legal moves from the start position.
+    Args:
+        count (int): Number of positions.
+        seed: Seed for the random generator.
+        max_plies (int): Longest random game played for one position.
+    Returns:
+        list: chess.Board positions that are not finished games.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = chess.Board()
+        for _ in range(rng.randint(0, max_plies)):
+            if board.is_game_over():
+                break
+            board.push(rng.choice(list(board.legal_moves)))
+        if not board.is_game_over():
+            positions.append(board)
+    return positions
+
+def benchmark(positions):
+    """
+    Compare leaf evaluations per second: every legal move of every position
+    is pushed, scored and popped, the pattern of a search at its leaves.
+    Args:
+        positions (list): chess.Board positions to expand.
+    """
+    def rescan(board):
+        start = time.perf_counter()
+        leaves = 0
+        for move in list(board.legal_moves):
+            board.push(move)
+            evaluate_board(board)
+            board.pop()
+            leaves += 1
+        return leaves, time.perf_counter() - start
+
+    def bitboards(board):
+        start = time.perf_counter()
+        leaves = 0
+        for move in list(board.legal_moves):
+            board.push(move)
+            evaluate(board)
+            board.pop()
+            leaves += 1
+        return leaves, time.perf_counter() - start
+
+    def incremental(board):
+        evaluator = Evaluator(board)
+        start = time.perf_counter()
+        leaves = 0
+        for move in list(board.legal_moves):
+            evaluator.push(move)
+            score = evaluator.score
+            evaluator.pop()
+            leaves += 1
+        return leaves, time.perf_counter() - start
+
+    baseline = None
+    for name, run in (("evaluate_board (rescan)", rescan), ("evaluate (bitboards)", bitboards),
+                      ("Evaluator (incremental)", incremental)):
+        leaves, elapsed = 0, 0.0
+        for board in positions:
+            count, seconds = run(board)
+            leaves += count
+            elapsed += seconds
+        rate = leaves / elapsed
+        baseline = baseline or rate
+        print(f"{name:26} {leaves} leaves in {elapsed:.3f}s ({rate:,.0f} leaves/s, {rate / baseline:.1f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chess engine benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    evaluation = commands.add_parser("eval", help="leaf evaluations per second of each evaluator")
+    evaluation.add_argument("--positions", type=int, default=500)
+    ordering = commands.add_parser("nodes", help="search nodes on the test positions per search improvement")
+    ordering.add_argument("--depth", type=int, default=ORDERING_DEPTH)
+    profiling = commands.add_parser("profile", help="profile searches of the test positions")
+    profiling.add_argument("--depth", type=int, default=ORDERING_DEPTH)
+    profiling.add_argument("--fen", help="profile this position instead")
+    profiling.add_argument("--trace", help="write a Chrome trace to this file")
+    profiling.add_argument("--log", help="write JSON-lines records to this file")
+    args = parser.parse_args()
+
+    if args.command == "eval":
+        benchmark(random_positions(args.positions, seed=1))
+    elif args.command == "profile":
+        profiles = []
+        for name, fen in [("fen", args.fen)] if args.fen else TEST_POSITIONS:
+            profile = SearchProfile(name)
+            iterative_deepening(chess.Board(fen), float("inf"), max_depth=args.depth, profile=profile)
+            profiles.append(profile)
+            summary = profile.summary()
+            seconds = ", ".join(f"{section} {seconds:.2f}s" for section, seconds in summary["seconds"].items())
+            print(f"{name}: {summary['nodes']} nodes in {summary['elapsed']:.2f}s, "
+                  f"first-move cutoffs {summary['first_move_cutoff_rate']:.0%}, {summary['evaluations']} evaluations; "
+                  f"{seconds}; pv {' '.join(summary['pv'])}")
+        if args.trace:
+            write_chrome_trace(profiles, args.trace)
+        if args.log:
+            with open(args.log, "w") as file:
+                for profile in profiles:
+                    profile.write_log(file)
+    else:
+        print(f"Nodes for depth {args.depth} on {len(TEST_POSITIONS)} test positions:")
+        for label, nodes, quiescence_nodes, elapsed in ordering_report(args.depth):
+            print(f"{label:14} {nodes:9} nodes ({quiescence_nodes} quiescence) in {elapsed:.2f}s")
@@ -0,0 +1,250 @@
+# Parallel chess search: Lazy SMP over chess_engine. Every worker process
+# runs the ordinary iterative deepening search on the same position and
+# they cooperate only through a transposition table in shared memory
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+
+import chess
+
+from ai_worker import SearchCancelled
+from chess_engine import (
+    MATE_THRESHOLD, MAX_DEPTH, TABLE_SIZE, TEST_POSITIONS, TIME_LIMIT_MS, SearchStats, iterative_deepening,
+)
+from chess_probing import Tablebases
+
+# Entry data layout, packed into one 64-bit word next to key ^ data
+MOVE_BITS = 0xFFFF
+DEPTH_SHIFT, FLAG_SHIFT, GENERATION_SHIFT, VALUE_SHIFT = 16, 24, 26, 32
+GENERATION_MASK = 0x3F
+VALUE_OFFSET = 1 << 31
+# Seconds between checks for a cancelled search while waiting on workers
+POLL_SECONDS = 0.05
+BENCHMARK_DEPTH = 4
+
+def encode_move(move):
+    """Pack a move into 15 bits; 0 is no move (a1a1 is never legal)"""
+    if move is None:
+        return 0
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+def decode_move(bits):
+    """Inverse of encode_move"""
+    if not bits:
+        return None
+    return chess.Move(bits & 63, bits >> 6 & 63, bits >> 12 or None)
+
+class SharedTranspositionTable:
+    def __init__(self, size=TABLE_SIZE, name=None):
+        """
+        Transposition table in multiprocessing.shared_memory, with the same
+        lookup/store interface as chess_engine.TranspositionTable. Each
+        slot is two 64-bit words, key ^ data and data, written without a
+        lock: a slot torn by two processes writing at once fails the key
+        check on lookup and reads as a miss.
+        Args:
+            size (int): Number of slots.
+            name (str): Attach to this existing table instead of creating one.
+        """
+        self.size = size
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=16 * size)
+        else:
+            # Pool workers share the creating process's resource tracker,
+            # which unlinks the table only if that process never does
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.owner = name is None
+        self.words = self.memory.buf.cast("Q")
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def new_search(self):
+        """Generations are set by ParallelSearcher; a worker keeps the one it was given"""
+
+    def lookup(self, key):
+        """
+        Returns:
+            tuple: The (key, depth, value, flag, move, generation) entry of
+                a key, or None.
+        """
+        slot = 2 * (key % self.size)
+        data = self.words[slot + 1]
+        if not data or self.words[slot] ^ data != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return (key, data >> DEPTH_SHIFT & 0xFF, (data >> VALUE_SHIFT) - VALUE_OFFSET, data >> FLAG_SHIFT & 3,
+                decode_move(data & MOVE_BITS), data >> GENERATION_SHIFT & GENERATION_MASK)
+
+    def store(self, key, depth, value, flag, move):
+        """Store a result, replacing a shallower or older entry of its slot"""
+        slot = 2 * (key % self.size)
+        current = self.words[slot + 1]
+        generation = self.generation & GENERATION_MASK
+        self.stores += 1
+        if (current and self.words[slot] ^ current != key and current >> GENERATION_SHIFT & GENERATION_MASK == generation
+                and depth < current >> DEPTH_SHIFT & 0xFF):
+            return
+        data = (encode_move(move) | min(depth, 0xFF) << DEPTH_SHIFT | flag << FLAG_SHIFT
+                | generation << GENERATION_SHIFT | (value + VALUE_OFFSET) << VALUE_SHIFT)
+        self.words[slot + 1] = data
+        self.words[slot] = key ^ data
+
+    def clear(self):
+        self.memory.buf[:] = bytes(16 * self.size)
+        self.hits = self.misses = self.stores = 0
+
+    def close(self):
+        self.words.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+# Shared table and stop flag of this worker process, and the tablebases it
+# has opened by directory
+_table = None
+_stop_event = None
+_tablebases = {}
+
+def _init_worker(name, size, stop_event):
+    global _table, _stop_event
+    _table = SharedTranspositionTable(size, name)
+    _stop_event = stop_event
+
+def _search_worker(board, time_limit_ms, max_depth, generation, start_depth, tablebase_dir):
+    """
+    One Lazy SMP thread of search. Returns (move, value, depth, nodes);
+    move and value are None if the search was stopped by another worker.
+    Tablebases cannot be sent between processes, so each worker opens the
+    directory it is given once and probes it inside its search.
+    """
+    _table.generation = generation
+    tablebase = None
+    if tablebase_dir is not None:
+        if tablebase_dir not in _tablebases:
+            _tablebases[tablebase_dir] = Tablebases(tablebase_dir)
+        tablebase = _tablebases[tablebase_dir]
+    stats = SearchStats()
+    try:
+        move, value, depth = iterative_deepening(board, time_limit_ms, _table, max_depth, _stop_event, stats, start_depth,
+                                                 tablebase=tablebase)
+    except SearchCancelled:
+        return None, None, stats.depth, stats.nodes
+    return move, value, depth, stats.nodes
+
+class ParallelSearcher:
+    def __init__(self, workers=None, table_size=TABLE_SIZE):
+        """
+        Lazy SMP search over a process pool. All workers search the same
+        position and share one SharedTranspositionTable, so each one finds
+        the results of the others in the table; helpers with an odd index
+        start one depth deeper to spread the work.
+        Args:
+            workers (int): Number of processes, default one per CPU.
+            table_size (int): Slots of the shared table.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.table = SharedTranspositionTable(table_size)
+        self.stop_event = multiprocessing.Event()
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                        initargs=(self.table.name, table_size, self.stop_event))
+        self.nodes = 0
+
+    def search(self, board, time_limit_ms=TIME_LIMIT_MS, max_depth=MAX_DEPTH, cancel_event=None, tablebase=None):
+        """
+        Search a position with every worker.
+        Args:
+            board (chess.Board): Position to search; it is not modified.
+            time_limit_ms (float): Time budget of each worker.
+            max_depth (int): Stop as soon as one worker completes this depth.
+            cancel_event (threading.Event): Stops the search with SearchCancelled.
+            tablebase (chess_probing.Tablebases): Tables every worker
+                probes inside its search, or None.
+        Returns:
+            tuple: (best move, score for the side to move, completed depth)
+                of the worker that got deepest, preferring the main worker.
+                On a checkmate or stalemate, (None, score, 1) as from the
+                serial iterative_deepening.
+        """
+        if not any(board.legal_moves):
+            # No worker would return a move; score the end of the game here
+            return iterative_deepening(board.copy(), time_limit_ms, self.table, 1, cancel_event)
+        self.table.generation += 1
+        self.stop_event.clear()
+        tablebase_dir = tablebase.directory if tablebase is not None else None
+        futures = [self.pool.submit(_search_worker, board, time_limit_ms, max_depth, self.table.generation,
+                                    1 + index % 2, tablebase_dir)
+                   for index in range(self.workers)]
+        index_of = {future: index for index, future in enumerate(futures)}
+        results = {}
+        running = set(futures)
+        while running:
+            done, running = wait(running, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+            if cancel_event is not None and cancel_event.is_set():
+                self.stop_event.set()
+            for future in done:
+                move, value, depth, nodes = future.result()
+                self.nodes += nodes
+                if move is not None:
+                    results[index_of[future]] = (move, value, depth)
+                    # The target depth or a mate is reached; stop the rest
+                    if depth >= max_depth or abs(value) >= MATE_THRESHOLD:
+                        self.stop_event.set()
+        if cancel_event is not None and cancel_event.is_set():
+            raise SearchCancelled()
+        best = min(results, key=lambda index: (-results[index][2], index))
+        return results[best]
+
+    def get_computer_move(self, board, time_limit_ms=TIME_LIMIT_MS, cancel_event=None, table=None, tablebase=None):
+        """
+        Best move within a time budget, like chess_engine.get_computer_move.
+        The workers only see the shared table, so table, if given, must be
+        this searcher's own self.table; it is kept for the whole game.
+        """
+        if table is not None and table is not self.table:
+            raise ValueError("the workers can only use the searcher's shared table")
+        return self.search(board, time_limit_ms, cancel_event=cancel_event, tablebase=tablebase)[0]
+
+    def close(self):
+        self.stop_event.set()
+        self.pool.shutdown()
+        self.table.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def benchmark(depth, max_workers, positions=TEST_POSITIONS):
+    """
+    Time to a fixed depth and nodes per second over the test positions
+    with 1..max_workers workers.
+    """
+    for workers in range(1, max_workers + 1):
+        with ParallelSearcher(workers) as searcher:
+            # Start the worker processes before timing
+            searcher.search(chess.Board(), max_depth=1)
+            searcher.nodes = 0
+            start = time.perf_counter()
+            for _, fen in positions:
+                searcher.search(chess.Board(fen), time_limit_ms=float("inf"), max_depth=depth)
+            elapsed = time.perf_counter() - start
+        print(f"{workers} workers depth {depth}: {elapsed:.2f}s, {searcher.nodes} nodes, "
+              f"{searcher.nodes / elapsed:,.0f} nodes/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Lazy SMP chess search")
+    parser.add_argument("--depth", type=int, default=BENCHMARK_DEPTH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    benchmark(args.depth, args.workers)
@@ -0,0 +1,207 @@
+# Opening book and endgame tablebase probing for the chess AI. Known
+# openings are played from a local Polyglot .bin book and small endgames
+# from local Syzygy tables, so those moves cost no search at all
+import argparse
+import os
+import random
+import time
+
+import chess
+import chess.polyglot
+import chess.syzygy
+
+from chess_engine import TIME_LIMIT_MS, TranspositionTable, iterative_deepening
+
+class OpeningBook:
+    def __init__(self, path, rng=None):
+        """
+        Polyglot .bin opening book. python-chess memory-maps the file and
+        binary searches its sorted 16-byte entries by position hash, so the
+        book is never loaded onto the heap.
+        Args:
+            path (str): Book file.
+            rng (random.Random): Picks between book moves by their weight.
+        """
+        self.reader = chess.polyglot.open_reader(path)
+        self.rng = rng or random.Random()
+
+    def probe(self, board):
+        """
+        Returns:
+            chess.Move: A book move chosen with probability proportional to
+                its weight, or None if the position is not in the book.
+        """
+        try:
+            return self.reader.weighted_choice(board, random=self.rng).move
+        except IndexError:
+            return None
+
+    def close(self):
+        self.reader.close()
+
+class Tablebases:
+    def __init__(self, directory):
+        """
+        Syzygy endgame tablebases from a local directory of .rtbw (win/draw/
+        loss) and .rtbz (distance to zeroing) files.
+        Args:
+            directory (str): Directory with the table files.
+        """
+        self.directory = directory
+        self.tablebase = chess.syzygy.open_tablebase(directory)
+        # "KRPvKR" covers 5 pieces: every letter but the "v"
+        names = [os.path.splitext(name)[0] for name in os.listdir(directory) if name.endswith(".rtbw")]
+        self.max_pieces = max((len(name) - 1 for name in names), default=0)
+
+    def covers(self, board):
+        return chess.popcount(board.occupied) <= self.max_pieces and not board.castling_rights
+
+    def probe_wdl(self, board):
+        """
+        Returns:
+            int: 2 win, 1 win blocked by the 50-move rule, 0 draw, -1, -2 for
+                the side to move, or None if no table covers the position.
+        """
+        if not self.covers(board):
+            return None
+        try:
+            return self.tablebase.probe_wdl(board)
+        except KeyError:  # MissingTableError
+            return None
+
+    def probe_move(self, board):
+        """
+        Best move of a covered position: the best tablebase result, then the
+        fastest win or the slowest loss by distance to zeroing.
+        Returns:
+            chess.Move: None if a table needed for the answer is missing.
+        """
+        if not self.covers(board):
+            return None
+        best_key, best_move = None, None
+        for move in list(board.legal_moves):
+            board.push(move)
+            try:
+                if board.is_checkmate():
+                    return move
+                # Probes are for the opponent, who is now to move
+                wdl = -self.tablebase.probe_wdl(board)
+                dtz = abs(self.tablebase.probe_dtz(board))
+            except KeyError:  # MissingTableError
+                return None
+            finally:
+                board.pop()
+            key = (wdl, -dtz if wdl > 0 else dtz)
+            if best_key is None or key > best_key:
+                best_key, best_move = key, move
+        return best_move
+
+    def close(self):
+        self.tablebase.close()
+
+class ProbeStats:
+    def __init__(self):
+        """Where the moves of a game came from and how long they took"""
+        self.book_hits = 0
+        self.tablebase_hits = 0
+        self.searches = 0
+        self.probe_seconds = 0.0
+        self.search_seconds = 0.0
+
+    def moves(self):
+        return self.book_hits + self.tablebase_hits + self.searches
+
+    def hit_rate(self):
+        moves = self.moves()
+        return (self.book_hits + self.tablebase_hits) / moves if moves else 0.0
+
+    def time_saved(self, time_limit_ms=TIME_LIMIT_MS):
+        """
+        Seconds saved by the probes: each hit saves an average search (the
+        time budget if nothing was searched) minus the time the probes took.
+        """
+        hits = self.book_hits + self.tablebase_hits
+        if not hits:
+            return 0.0
+        average = self.search_seconds / self.searches if self.searches else time_limit_ms / 1000
+        return hits * average - self.probe_seconds
+
+    def report(self, time_limit_ms=TIME_LIMIT_MS):
+        return (f"{self.moves()} moves: {self.book_hits} from the book, {self.tablebase_hits} from tablebases, "
+                f"{self.searches} searched; hit rate {self.hit_rate():.0%}, "
+                f"about {self.time_saved(time_limit_ms):.1f}s saved")
+
+class ProbingSearcher:
+    def __init__(self, book_path=None, tablebase_dir=None, searcher=None, rng=None):
+        """
+        Choose moves from the opening book, then the tablebases, and only
+        search when neither has an answer. The tablebases are also probed
+        inside the search, including a delegated one.
+        Args:
+            book_path (str): Polyglot .bin book, or None.
+            tablebase_dir (str): Syzygy directory, or None.
+            searcher: Object with get_computer_move(board, time_limit_ms,
+                cancel_event, table, tablebase), such as
+                chess_parallel.ParallelSearcher, to search with instead of
+                chess_engine.iterative_deepening.
+            rng (random.Random): Picks between book moves.
+        """
+        self.book = OpeningBook(book_path, rng) if book_path else None
+        self.tablebases = Tablebases(tablebase_dir) if tablebase_dir else None
+        self.searcher = searcher
+        self.stats = ProbeStats()
+
+    def get_computer_move(self, board, table=None, time_limit_ms=TIME_LIMIT_MS, cancel_event=None):
+        """Best move for the side to move, like chess_engine.get_computer_move"""
+        start = time.perf_counter()
+        move = self.book.probe(board) if self.book is not None else None
+        if move is not None:
+            self.stats.book_hits += 1
+        elif self.tablebases is not None:
+            move = self.tablebases.probe_move(board)
+            if move is not None:
+                self.stats.tablebase_hits += 1
+        self.stats.probe_seconds += time.perf_counter() - start
+        if move is not None:
+            return move
+
+        start = time.perf_counter()
+        if self.searcher is not None:
+            move = self.searcher.get_computer_move(board, time_limit_ms, cancel_event, table, self.tablebases)
+        else:
+            move, _, _ = iterative_deepening(board, time_limit_ms, table, cancel_event=cancel_event,
+                                             tablebase=self.tablebases)
+        self.stats.search_seconds += time.perf_counter() - start
+        self.stats.searches += 1
+        return move
+
+    def new_game(self):
+        """Start counting a new game"""
+        self.stats = ProbeStats()
+
+    def close(self):
+        if self.book is not None:
+            self.book.close()
+        if self.tablebases is not None:
+            self.tablebases.close()
+
+# Play games of the AI against itself and report where its moves came from
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Book and tablebase hit rates in self-play games")
+    parser.add_argument("--book", help="Polyglot .bin opening book")
+    parser.add_argument("--syzygy", help="directory of Syzygy tables")
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--time-ms", type=float, default=TIME_LIMIT_MS)
+    parser.add_argument("--max-moves", type=int, default=200, help="plies before a game is abandoned")
+    parser.add_argument("--fen", default=chess.STARTING_FEN, help="start position of every game")
+    args = parser.parse_args()
+
+    searcher = ProbingSearcher(args.book, args.syzygy, rng=random.Random(1))
+    for game in range(1, args.games + 1):
+        searcher.new_game()
+        board = chess.Board(args.fen)
+        table = TranspositionTable()
+        while not board.is_game_over(claim_draw=True) and len(board.move_stack) < args.max_moves:
+            board.push(searcher.get_computer_move(board, table, args.time_ms))
+        print(f"game {game} ({board.result(claim_draw=True)}): {searcher.stats.report(args.time_ms)}")
+    searcher.close()
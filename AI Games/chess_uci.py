@@ -0,0 +1,246 @@
+# UCI driver for chess_engine: reads commands on stdin and answers on
+# stdout, so the AI can play in any UCI chess GUI or be driven by scripts.
+# It imports nothing from pygame and starts in milliseconds
+import time
+
+STARTED = time.perf_counter()
+
+import sys
+import threading
+
+import chess
+
+from ai_worker import SearchCancelled
+from chess_engine import (
+    MATE_SCORE, MATE_THRESHOLD, MAX_DEPTH, TIME_LIMIT_MS, SearchStats, TranspositionTable, iterative_deepening,
+    principal_variation,
+)
+
+ENGINE_NAME = "AI Games Chess"
+ENGINE_AUTHOR = "AI Games"
+MOVES_TO_GO = 30  # Moves the remaining clock time is spread over when the GUI does not say
+MOVE_OVERHEAD_MS = 20  # Time kept back per move for communication
+POSITIVE_PARAMS = ("movetime", "depth", "movestogo", "nodes")  # go parameters that must be at least 1
+
+# Milliseconds from the start of this module to the end of its imports
+IMPORT_MS = (time.perf_counter() - STARTED) * 1000
+
+def format_score(value):
+    """
+    UCI score of a search value for the side to move.
+    Returns:
+        str: "cp <centipawns>" or "mate <moves>", negative if being mated.
+    """
+    if abs(value) >= MATE_THRESHOLD:
+        moves = (MATE_SCORE - abs(value) + 1) // 2
+        return f"mate {moves if value > 0 else -moves}"
+    return f"cp {value}"
+
+def parse_go(tokens):
+    """
+    Read the parameters of a go command. A number that is not a
+    non-negative integer, or is 0 for one of POSITIVE_PARAMS, raises
+    ValueError.
+    Args:
+        tokens (list): Words after "go".
+    Returns:
+        dict: Integer parameters such as movetime or wtime, and
+            infinite=True or ponder=True if present.
+    """
+    params = {}
+    for index, token in enumerate(tokens):
+        if token in ("infinite", "ponder"):
+            params[token] = True
+        elif token in ("movetime", "depth", "wtime", "btime", "winc", "binc", "movestogo", "nodes"):
+            if index + 1 < len(tokens):
+                value = tokens[index + 1]
+                if not value.isdigit():
+                    raise ValueError(f"{token} needs a non-negative integer, got {value!r}")
+                if token in POSITIVE_PARAMS and int(value) < 1:
+                    raise ValueError(f"{token} must be at least 1, got {value}")
+                params[token] = int(value)
+    return params
+
+def allocate_time(params, turn):
+    """
+    Time budget of a move in milliseconds.
+    Args:
+        params (dict): Result of parse_go.
+        turn (chess.Color): Side to move.
+    Returns:
+        float: movetime if given, a share of the clock if wtime/btime are,
+            unlimited for depth or infinite searches, otherwise TIME_LIMIT_MS.
+    """
+    if "movetime" in params:
+        return max(params["movetime"] - MOVE_OVERHEAD_MS, 1)
+    clock = params.get("wtime" if turn == chess.WHITE else "btime")
+    if clock is not None:
+        increment = params.get("winc" if turn == chess.WHITE else "binc", 0)
+        budget = clock / params.get("movestogo", MOVES_TO_GO) + increment - MOVE_OVERHEAD_MS
+        return max(min(budget, clock / 2), 1)
+    if params.get("infinite") or "depth" in params:
+        return float("inf")
+    return TIME_LIMIT_MS
+
+class UCIEngine:
+    def __init__(self, output=None):
+        """
+        State of one UCI session.
+        Args:
+            output (callable): Called with each line to send; prints to
+                stdout by default.
+        """
+        self.output = output or (lambda line: print(line, flush=True))
+        self.output_lock = threading.Lock()
+        self.board = chess.Board()
+        # Created on the first search, so startup stays fast
+        self.table = None
+        self.search_thread = None
+        self.cancel_event = threading.Event()
+        # Set once bestmove may be sent; go infinite and go ponder hold it
+        # back until stop (or ponderhit)
+        self.release_event = threading.Event()
+
+    def send(self, line):
+        with self.output_lock:
+            self.output(line)
+
+    def handle(self, line):
+        """
+        Process one command line.
+        Returns:
+            bool: False once the session should end.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.stop()
+            if self.table is not None:
+                self.table.clear()
+            self.board = chess.Board()
+        elif command == "position":
+            self.stop()
+            self.set_position(args)
+        elif command == "go":
+            self.stop()
+            try:
+                params = parse_go(args)
+            except ValueError as error:
+                self.send(f"info string bad go: {error}")
+            else:
+                self.go(params)
+        elif command == "stop":
+            self.stop()
+        elif command == "ponderhit":
+            # The expected move was played: answer once the search ends
+            self.release_event.set()
+        elif command == "quit":
+            self.stop()
+            return False
+        elif command == "startup":
+            # Not part of UCI: report how long the engine took to load
+            self.send(f"info string startup {IMPORT_MS:.1f} ms imports, {(time.perf_counter() - STARTED) * 1000:.1f} ms since start")
+        else:
+            self.send(f"info string unknown command {command}")
+        return True
+
+    def set_position(self, args):
+        """Handle "position [startpos | fen <fen>] [moves <move> ...]" """
+        if "moves" in args:
+            split = args.index("moves")
+            setup, moves = args[:split], args[split + 1:]
+        else:
+            setup, moves = args, []
+        try:
+            if setup and setup[0] == "fen":
+                board = chess.Board(" ".join(setup[1:]))
+            else:
+                board = chess.Board()
+            for move in moves:
+                board.push_uci(move)
+        except ValueError as error:
+            self.send(f"info string bad position: {error}")
+            return
+        self.board = board
+
+    def go(self, params):
+        """Start searching the current position on a background thread"""
+        if self.table is None:
+            self.table = TranspositionTable()
+        time_limit_ms = allocate_time(params, self.board.turn)
+        max_depth = params.get("depth", MAX_DEPTH)
+        self.cancel_event = threading.Event()
+        self.release_event = threading.Event()
+        if not (params.get("infinite") or params.get("ponder")):
+            self.release_event.set()
+        self.search_thread = threading.Thread(target=self.search, args=(self.board.copy(), time_limit_ms, max_depth,
+                                                                       self.cancel_event, self.release_event),
+                                              daemon=True)
+        self.search_thread.start()
+
+    def search(self, board, time_limit_ms, max_depth, cancel_event, release_event):
+        """
+        Run the search, sending info lines per depth and then bestmove.
+        A search that ends by itself (mate found, MAX_DEPTH reached) under
+        go infinite or go ponder waits for release_event first, as UCI
+        forbids bestmove before stop or ponderhit there.
+        """
+        best = [None]
+
+        def report(move, value, depth, stats):
+            if move is None:
+                # No legal moves: nothing to report before bestmove 0000
+                return
+            best[0] = move
+            pv = " ".join(pv_move.uci() for pv_move in principal_variation(board, self.table, depth)) or move.uci()
+            milliseconds = int(stats.elapsed * 1000)
+            self.send(f"info depth {depth} score {format_score(value)} nodes {stats.nodes} "
+                      f"nps {int(stats.nodes_per_second())} time {milliseconds} pv {pv}")
+
+        try:
+            iterative_deepening(board, time_limit_ms, self.table, max_depth, cancel_event, SearchStats(),
+                                on_iteration=report)
+        except SearchCancelled:
+            pass
+        move = best[0]
+        if move is None:
+            # Stopped before depth 1 finished: any legal move will do
+            move = next(iter(board.legal_moves), None)
+        release_event.wait()
+        self.send(f"bestmove {move.uci() if move else '0000'}")
+
+    def stop(self):
+        """End the running search; it still answers with its best move"""
+        if self.search_thread is not None:
+            self.cancel_event.set()
+            self.release_event.set()
+            self.search_thread.join()
+            self.search_thread = None
+
+    def wait(self):
+        """Let the running search finish on its own; one waiting for stop is stopped"""
+        if not self.release_event.is_set():
+            self.stop()
+        elif self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+
+def main():
+    engine = UCIEngine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            return
+    # End of input, e.g. a piped script: finish the last search first
+    engine.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import random
+import time
+
+import numpy as np
+
+from connect_four_engine import (
+    ROWS, COLUMNS, EMPTY, PLAYER_PIECE, COMPUTER_PIECE, WINDOW_CELLS, WINDOW_SCORES,
+    create_board, get_valid_locations, is_terminal_node,
+)
+
+# Cell codes used in batch arrays
+CELL_CODES = {EMPTY: 0, PLAYER_PIECE: 1, COMPUTER_PIECE: 2}
+# Rows scored per chunk, so huge batches do not build huge temporaries
+CHUNK_SIZE = 1 << 16
+
+# Flat (row * COLUMNS + col) indices of the four cells of every window
+WINDOW_INDEX = np.array([[r * COLUMNS + c for r, c in window] for window in WINDOW_CELLS], dtype=np.intp)
+CENTER_INDEX = np.array([r * COLUMNS + COLUMNS // 2 for r in range(ROWS)], dtype=np.intp)
+# evaluate_window weights as an array indexed by [own count, opponent count]
+SCORE_TABLE = np.array(WINDOW_SCORES, dtype=np.int64)
+
+# Convert positions to an (N, ROWS, COLUMNS) int8 array of cell codes,
+# with row 0 at the top like print_board
+def positions_to_array(positions):
+    boards = np.zeros((len(positions), ROWS, COLUMNS), dtype=np.int8)
+    for n, position in enumerate(positions):
+        for r in range(ROWS):
+            for c in range(COLUMNS):
+                boards[n, r, c] = CELL_CODES[position.cell(r, c)]
+    return boards
+
+# Score N boards at once for the given piece; equal to score_position on
+# each board
+def score_positions(boards, piece):
+    flat = np.asarray(boards, dtype=np.int8).reshape(-1, ROWS * COLUMNS)
+    own_code = CELL_CODES[piece]
+    opp_code = CELL_CODES[PLAYER_PIECE if piece == COMPUTER_PIECE else COMPUTER_PIECE]
+    scores = np.empty(len(flat), dtype=np.int64)
+
+    for start in range(0, len(flat), CHUNK_SIZE):
+        chunk = flat[start:start + CHUNK_SIZE]
+        windows = chunk[:, WINDOW_INDEX]
+        own = np.count_nonzero(windows == own_code, axis=2)
+        opp = np.count_nonzero(windows == opp_code, axis=2)
+        center = np.count_nonzero(chunk[:, CENTER_INDEX] == own_code, axis=1)
+        scores[start:start + CHUNK_SIZE] = SCORE_TABLE[own, opp].sum(axis=1) + center * 6
+
+    return scores
+
+# Boolean mask of the boards where the given piece has four in a row
+def winning_positions(boards, piece):
+    flat = np.asarray(boards, dtype=np.int8).reshape(-1, ROWS * COLUMNS)
+    code = CELL_CODES[piece]
+    wins = np.empty(len(flat), dtype=bool)
+
+    for start in range(0, len(flat), CHUNK_SIZE):
+        windows = flat[start:start + CHUNK_SIZE][:, WINDOW_INDEX]
+        wins[start:start + CHUNK_SIZE] = np.all(windows == code, axis=2).any(axis=1)
+
+    return wins
+
+# Random legal positions reached by alternating random moves
+def random_positions(count, seed=None):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = create_board()
+        piece = PLAYER_PIECE
+        for _ in range(rng.randint(0, ROWS * COLUMNS)):
+            if is_terminal_node(board):
+                break
+            board.make(rng.choice(get_valid_locations(board)), piece)
+            piece = COMPUTER_PIECE if piece == PLAYER_PIECE else PLAYER_PIECE
+        positions.append(board)
+    return positions
+
+# Report batch scoring throughput
+if __name__ == "__main__":
+    positions = random_positions(1000, seed=1)
+    boards = np.tile(positions_to_array(positions), (200, 1, 1))
+    start = time.perf_counter()
+    score_positions(boards, COMPUTER_PIECE)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(boards)} positions in {elapsed:.3f}s ({len(boards) / elapsed:,.0f} positions/s)")
@@ -0,0 +1,669 @@
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+from search_profile import EVALUATION, MOVE_GENERATION, TERMINAL, SearchProfile, write_chrome_trace
+
+# Game configuration constants
+ROWS = 6
+COLUMNS = 7
+EMPTY = " "
+PLAYER_PIECE = "X"
+COMPUTER_PIECE = "O"
+TIME_LIMIT_MS = 500  # Per-move search budget for the computer
+TABLE_SIZE = 1 << 18  # Entries per transposition table tier
+
+# Bitboard layout: each column owns ROWS + 1 bits, bit 0 of a column is its
+# bottom cell and the extra top bit stays empty so shifts never wrap columns
+COLUMN_HEIGHT = ROWS + 1
+PIECE_INDEX = {PLAYER_PIECE: 0, COMPUTER_PIECE: 1}
+BOTTOM_MASK = sum(1 << (c * COLUMN_HEIGHT) for c in range(COLUMNS))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROWS) - 1)
+COLUMN_MASKS = [((1 << ROWS) - 1) << (c * COLUMN_HEIGHT) for c in range(COLUMNS)]
+TOP_CELLS = [1 << (c * COLUMN_HEIGHT + ROWS - 1) for c in range(COLUMNS)]
+CENTER_MASK = COLUMN_MASKS[COLUMNS // 2]
+# Shift distances for vertical, horizontal, and both diagonal directions
+DIRECTIONS = (1, COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1)
+
+# Random 64-bit Zobrist keys for every (piece, bit) pair, plus one for the
+# side to move; seeded so hashes are stable between runs
+_zobrist_random = random.Random(2024)
+ZOBRIST_KEYS = [[_zobrist_random.getrandbits(64) for _ in range(COLUMNS * COLUMN_HEIGHT)] for _ in range(2)]
+ZOBRIST_MAXIMIZING = _zobrist_random.getrandbits(64)
+
+# Scores of decided positions, from the computer's point of view
+COMPUTER_WIN_SCORE = 100000000000000
+PLAYER_WIN_SCORE = -10000000000000
+
+# Static move order: center column first, then outwards
+CENTER_ORDER = sorted(range(COLUMNS), key=lambda c: abs(c - COLUMNS // 2))
+KILLER_SLOTS = 2
+
+# Transposition table bound flags
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Bit index of the cell at (row, col), where row 0 is the top row
+def cell_bit(row, col):
+    return col * COLUMN_HEIGHT + (ROWS - 1 - row)
+
+# Bitboard position: one 64-bit int per piece, an occupancy mask and the
+# next free bit of every column, so a move is made or undone in O(1). The
+# Zobrist hash, the piece counts of every four-cell window and the
+# score_position total of both pieces are kept up to date alongside
+class Position:
+    def __init__(self):
+        self.bitboards = [0, 0]
+        self.mask = 0
+        self.hash = 0
+        self.heights = [c * COLUMN_HEIGHT for c in range(COLUMNS)]
+        self.history = []
+        self.window_codes = [0] * len(WINDOW_MASKS)
+        self.scores = [0, 0]
+
+    # Drop a piece into a column
+    def make(self, col, piece):
+        index = PIECE_INDEX[piece]
+        height = self.heights[col]
+        bit = 1 << height
+        self.bitboards[index] |= bit
+        self.mask |= bit
+        self.hash ^= ZOBRIST_KEYS[index][height]
+        self.heights[col] = height + 1
+        self.history.append((col, index))
+
+        # Only the windows through the new cell change
+        player_deltas, computer_deltas = WINDOW_DELTAS[index]
+        step = WINDOW_STEPS[index]
+        codes = self.window_codes
+        scores = self.scores
+        for window in CELL_WINDOWS[height]:
+            code = codes[window]
+            scores[0] += player_deltas[code]
+            scores[1] += computer_deltas[code]
+            codes[window] = code + step
+        scores[index] += CENTER_BONUS[height]
+
+    # Take back the last move
+    def unmake(self):
+        col, index = self.history.pop()
+        height = self.heights[col] - 1
+        bit = 1 << height
+        self.bitboards[index] ^= bit
+        self.mask ^= bit
+        self.hash ^= ZOBRIST_KEYS[index][height]
+        self.heights[col] = height
+
+        player_deltas, computer_deltas = WINDOW_DELTAS[index]
+        step = WINDOW_STEPS[index]
+        codes = self.window_codes
+        scores = self.scores
+        for window in CELL_WINDOWS[height]:
+            code = codes[window] - step
+            scores[0] -= player_deltas[code]
+            scores[1] -= computer_deltas[code]
+            codes[window] = code
+        scores[index] -= CENTER_BONUS[height]
+
+    def can_play(self, col):
+        return not self.mask & TOP_CELLS[col]
+
+    # Piece at (row, col) using the top-down row numbering of print_board
+    def cell(self, row, col):
+        bit = 1 << cell_bit(row, col)
+        if self.bitboards[0] & bit:
+            return PLAYER_PIECE
+        if self.bitboards[1] & bit:
+            return COMPUTER_PIECE
+        return EMPTY
+
+    def move_count(self):
+        return len(self.history)
+
+    def copy(self):
+        position = Position()
+        position.bitboards = self.bitboards[:]
+        position.mask = self.mask
+        position.hash = self.hash
+        position.heights = self.heights[:]
+        position.history = self.history[:]
+        position.window_codes = self.window_codes[:]
+        position.scores = self.scores[:]
+        return position
+
+# Bounded transposition table with two entries per slot: a depth-preferred
+# entry that only a search at least as deep may replace, and an
+# always-replace entry that keeps the most recent result
+class TranspositionTable:
+    def __init__(self, size=TABLE_SIZE):
+        self.size = size
+        self.depth_entries = [None] * size
+        self.recent_entries = [None] * size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    # Return the (key, depth, value, flag, best_col) entry for a key, or None
+    def lookup(self, key):
+        slot = key % self.size
+        entry = self.depth_entries[slot]
+        if entry is None or entry[0] != key:
+            entry = self.recent_entries[slot]
+            if entry is None or entry[0] != key:
+                self.misses += 1
+                return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, value, flag, best_col):
+        slot = key % self.size
+        entry = (key, depth, value, flag, best_col)
+        current = self.depth_entries[slot]
+        self.stores += 1
+        if current is None or current[0] == key or depth >= current[1]:
+            self.depth_entries[slot] = entry
+            if current is not None and current[0] != key:
+                self.recent_entries[slot] = current
+        else:
+            self.recent_entries[slot] = entry
+
+    def clear(self):
+        self.depth_entries = [None] * self.size
+        self.recent_entries = [None] * self.size
+        self.hits = self.misses = self.stores = 0
+
+    # Counters for sizing the table
+    def stats(self):
+        probes = self.hits + self.misses
+        used = sum(entry is not None for entry in self.depth_entries)
+        used += sum(entry is not None for entry in self.recent_entries)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "fill": used / (2 * self.size),
+        }
+
+# Check a single bitboard for four in a row with shift-and-mask
+def has_four(bitboard):
+    for shift in DIRECTIONS:
+        pairs = bitboard & (bitboard >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+# Create an empty game board
+def create_board():
+    return Position()
+
+# Check if the top of the column is empty
+def is_valid_location(board, col):
+    return board.can_play(col)
+
+# Get the next available row in a column from bottom up
+def get_next_open_row(board, col):
+    height = board.heights[col] - col * COLUMN_HEIGHT
+    if height < ROWS:
+        return ROWS - 1 - height
+    return None
+
+# Place the player's or computer's piece in the board; pieces always land on
+# top of the column, so row is only kept for callers of get_next_open_row
+def drop_piece(board, row, col, piece):
+    board.make(col, piece)
+
+# Check all winning possibilities for a piece
+def winning_move(board, piece):
+    return has_four(board.bitboards[PIECE_INDEX[piece]])
+
+# Return a list of columns where a piece can still be dropped
+def get_valid_locations(board):
+    return [col for col in range(COLUMNS) if not board.mask & TOP_CELLS[col]]
+
+# Evaluate the usefulness of a 4-piece window
+def evaluate_window(window, piece):
+    score = 0
+    opp_piece = PLAYER_PIECE if piece == COMPUTER_PIECE else COMPUTER_PIECE
+
+    if window.count(piece) == 4:
+        score += 100
+    elif window.count(piece) == 3 and window.count(EMPTY) == 1:
+        score += 10
+    elif window.count(piece) == 2 and window.count(EMPTY) == 2:
+        score += 5
+
+    if window.count(opp_piece) == 3 and window.count(EMPTY) == 1:
+        score -= 80
+
+    return score
+
+# Cells of all 69 four-cell windows: horizontal, vertical and diagonals
+def build_windows():
+    windows = []
+    for r in range(ROWS):
+        for c in range(COLUMNS - 3):
+            windows.append([(r, c + i) for i in range(4)])
+    for c in range(COLUMNS):
+        for r in range(ROWS - 3):
+            windows.append([(r + i, c) for i in range(4)])
+    for r in range(ROWS - 3):
+        for c in range(COLUMNS - 3):
+            windows.append([(r + i, c + i) for i in range(4)])
+    for r in range(3, ROWS):
+        for c in range(COLUMNS - 3):
+            windows.append([(r - i, c + i) for i in range(4)])
+    return windows
+
+WINDOW_CELLS = build_windows()
+WINDOW_MASKS = [sum(1 << cell_bit(r, c) for r, c in window) for window in WINDOW_CELLS]
+
+# evaluate_window scores indexed by [own pieces][opponent pieces] in a window
+WINDOW_SCORES = [
+    [evaluate_window([COMPUTER_PIECE] * own + [PLAYER_PIECE] * opp + [EMPTY] * (4 - own - opp), COMPUTER_PIECE)
+     if own + opp <= 4 else 0 for opp in range(5)]
+    for own in range(5)
+]
+
+# Incremental evaluation tables. A window's state is one code,
+# player pieces + 5 * computer pieces; WINDOW_DELTAS[mover][side][code] is
+# how much side's score changes when mover adds a piece to that window
+WINDOW_STEPS = (1, 5)
+CELL_WINDOWS = [
+    tuple(w for w, window in enumerate(WINDOW_MASKS) if window >> bit & 1)
+    for bit in range(COLUMNS * COLUMN_HEIGHT)
+]
+CENTER_BONUS = [6 if CENTER_MASK >> bit & 1 else 0 for bit in range(COLUMNS * COLUMN_HEIGHT)]
+
+def build_window_deltas():
+    def code_score(side, code):
+        player, computer = code % 5, code // 5
+        return WINDOW_SCORES[computer][player] if side else WINDOW_SCORES[player][computer]
+
+    deltas = []
+    for mover in range(2):
+        step = WINDOW_STEPS[mover]
+        per_side = []
+        for side in range(2):
+            table = [0] * 25
+            for code in range(25):
+                if code % 5 + code // 5 < 4:
+                    table[code] = code_score(side, code + step) - code_score(side, code)
+            per_side.append(table)
+        deltas.append(tuple(per_side))
+    return deltas
+
+WINDOW_DELTAS = build_window_deltas()
+
+# Score the board for the given player to help the AI decide moves; the
+# total is maintained by Position.make/unmake, so this is O(1)
+def score_position(board, piece):
+    return board.scores[PIECE_INDEX[piece]]
+
+# Full rescan of every window, equal to score_position
+def score_position_rescan(board, piece):
+    own = board.bitboards[PIECE_INDEX[piece]]
+    opp = board.bitboards[1 - PIECE_INDEX[piece]]
+
+    # Score center column higher
+    score = (own & CENTER_MASK).bit_count() * 6
+
+    # Score every horizontal, vertical and diagonal window
+    for window in WINDOW_MASKS:
+        score += WINDOW_SCORES[(own & window).bit_count()][(opp & window).bit_count()]
+
+    return score
+
+# Check whether the game has ended
+def is_terminal_node(board):
+    return winning_move(board, PLAYER_PIECE) or winning_move(board, COMPUTER_PIECE) or board.mask == BOARD_MASK
+
+# Raised inside minimax when the search deadline has passed
+class SearchTimeout(Exception):
+    pass
+
+# Per-search state passed down the minimax recursion: an optional
+# transposition table, an optional perf_counter() deadline, the move
+# ordering heuristics, node counters and an optional SearchProfile.
+# Killers and history can be switched off to measure what each of them
+# saves
+class SearchContext:
+    def __init__(self, table=None, deadline=None, killers=True, history=True, profile=None):
+        self.table = table
+        self.deadline = deadline
+        self.profile = profile
+        self.use_killers = killers
+        self.use_history = history
+        self.killers = [[] for _ in range(ROWS * COLUMNS + 1)]
+        self.history = [[0] * (COLUMNS * COLUMN_HEIGHT) for _ in range(2)]
+        self.nodes = 0
+
+    # Order columns: table move, killers of this ply, then center-first
+    # static order refined by the history score of the cell each drop fills
+    def order_moves(self, board, valid_locations, table_col, ply, index):
+        ordered = [col for col in CENTER_ORDER if col in valid_locations]
+        if self.use_history:
+            scores = self.history[index]
+            heights = board.heights
+            ordered.sort(key=lambda col: -scores[heights[col]])
+        if self.use_killers:
+            for col in reversed(self.killers[ply]):
+                if col in ordered:
+                    ordered.remove(col)
+                    ordered.insert(0, col)
+        if table_col in ordered:
+            ordered.remove(table_col)
+            ordered.insert(0, table_col)
+        return ordered
+
+    # Remember a move that caused a beta cutoff
+    def record_cutoff(self, board, col, ply, depth, index):
+        if self.use_killers:
+            killers = self.killers[ply]
+            if col not in killers:
+                killers.insert(0, col)
+                del killers[KILLER_SLOTS:]
+        if self.use_history:
+            self.history[index][board.heights[col]] += depth * depth
+
+# Node counts of an iterative deepening search, one entry per completed depth
+class SearchStats:
+    def __init__(self):
+        self.iteration_nodes = []
+        self.nodes = 0
+        self.depth = 0
+        self.elapsed = 0.0
+
+    # Nodes of the deepest iteration over nodes of the one before it
+    def branching_factor(self):
+        if len(self.iteration_nodes) < 2:
+            return 0.0
+        return self.iteration_nodes[-1] / self.iteration_nodes[-2]
+
+    # b such that b ** depth equals the nodes of the deepest iteration
+    def effective_branching_factor(self):
+        if not self.iteration_nodes:
+            return 0.0
+        return self.iteration_nodes[-1] ** (1 / self.depth)
+
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+# Minimax algorithm with alpha-beta pruning
+def minimax(board, depth, alpha, beta, maximizingPlayer, context=None, ply=0):
+    if context is None:
+        context = SearchContext()
+    context.nodes += 1
+    if context.deadline is not None and time.perf_counter() >= context.deadline:
+        raise SearchTimeout()
+
+    profile = context.profile
+    if profile is None:
+        valid_locations = get_valid_locations(board)
+        is_terminal = is_terminal_node(board)
+    else:
+        profile.node(ply)
+        valid_locations = profile.timed(MOVE_GENERATION, get_valid_locations, board)
+        is_terminal = profile.timed(TERMINAL, is_terminal_node, board)
+
+    if depth == 0 or is_terminal:
+        if is_terminal:
+            if winning_move(board, COMPUTER_PIECE):
+                return (None, COMPUTER_WIN_SCORE)
+            elif winning_move(board, PLAYER_PIECE):
+                return (None, PLAYER_WIN_SCORE)
+            else:
+                return (None, 0)
+        elif profile is None:
+            return (None, score_position(board, COMPUTER_PIECE))
+        else:
+            return (None, profile.timed(EVALUATION, score_position, board, COMPUTER_PIECE))
+
+    index = 1 if maximizingPlayer else 0
+    table_col = None
+    table = context.table
+    if table is not None:
+        key = board.hash ^ ZOBRIST_MAXIMIZING if maximizingPlayer else board.hash
+        entry = table.lookup(key)
+        if entry is not None:
+            _, entry_depth, value, flag, col = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return col, value
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return col, value
+            # The stored best column (the previous iteration's principal
+            # variation along the PV) is searched first
+            table_col = col
+        alpha_orig, beta_orig = alpha, beta
+
+    if profile is None:
+        ordered = context.order_moves(board, valid_locations, table_col, ply, index)
+    else:
+        ordered = profile.timed(MOVE_GENERATION, context.order_moves, board, valid_locations, table_col, ply, index)
+    best_col = ordered[0]
+    if maximizingPlayer:
+        value = -math.inf
+        for col in ordered:
+            board.make(col, COMPUTER_PIECE)
+            new_score = minimax(board, depth - 1, alpha, beta, False, context, ply + 1)[1]
+            board.unmake()
+            if new_score > value:
+                value = new_score
+                best_col = col
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                context.record_cutoff(board, col, ply, depth, index)
+                if profile is not None:
+                    profile.cutoff(col == ordered[0])
+                break
+    else:
+        value = math.inf
+        for col in ordered:
+            board.make(col, PLAYER_PIECE)
+            new_score = minimax(board, depth - 1, alpha, beta, True, context, ply + 1)[1]
+            board.unmake()
+            if new_score < value:
+                value = new_score
+                best_col = col
+            beta = min(beta, value)
+            if alpha >= beta:
+                context.record_cutoff(board, col, ply, depth, index)
+                if profile is not None:
+                    profile.cutoff(col == ordered[0])
+                break
+
+    if table is not None:
+        if value <= alpha_orig:
+            flag = UPPER_BOUND
+        elif value >= beta_orig:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        table.store(key, depth, value, flag, best_col)
+    return best_col, value
+
+# Follow best columns stored in the table from the given position
+def principal_variation(board, table, maximizingPlayer, max_length=COLUMNS * ROWS):
+    line = []
+    position = board.copy()
+    while len(line) < max_length and not is_terminal_node(position):
+        key = position.hash ^ ZOBRIST_MAXIMIZING if maximizingPlayer else position.hash
+        entry = table.lookup(key)
+        if entry is None or entry[4] is None or not position.can_play(entry[4]):
+            break
+        line.append(entry[4])
+        position.make(entry[4], COMPUTER_PIECE if maximizingPlayer else PLAYER_PIECE)
+        maximizingPlayer = not maximizingPlayer
+    return line
+
+# Search depth 1, 2, 3, ... until the time budget runs out and return
+# (column, score, depth) from the last depth that finished. Depth 1 always
+# completes so there is a move even with a tiny budget. Killers and history
+# carry over between iterations; node counts go into stats if given, and
+# per-iteration details with the principal variation into a SearchProfile
+def iterative_deepening(board, time_limit_ms=TIME_LIMIT_MS, table=None, max_depth=None, maximizingPlayer=True, stats=None,
+                        profile=None):
+    if table is None:
+        table = TranspositionTable()
+    if max_depth is None:
+        max_depth = ROWS * COLUMNS - board.move_count()
+    if stats is None:
+        stats = SearchStats()
+    start = time.perf_counter()
+    deadline = start + time_limit_ms / 1000
+    root_moves = board.move_count()
+    best_col, best_value, completed_depth = None, 0, 0
+    context = SearchContext(table, profile=profile)
+
+    for depth in range(1, max(max_depth, 1) + 1):
+        nodes_before = context.nodes
+        try:
+            col, value = minimax(board, depth, -math.inf, math.inf, maximizingPlayer, context)
+        except SearchTimeout:
+            while board.move_count() > root_moves:
+                board.unmake()
+            break
+        finally:
+            stats.nodes = context.nodes
+            stats.elapsed = time.perf_counter() - start
+        context.deadline = deadline
+        stats.iteration_nodes.append(context.nodes - nodes_before)
+        stats.depth = depth
+        best_col, best_value, completed_depth = col, value, depth
+        if profile is not None:
+            profile.iteration(depth, value, principal_variation(board, table, maximizingPlayer, depth))
+        # A forced win or loss will not change with more depth
+        if value in (COMPUTER_WIN_SCORE, PLAYER_WIN_SCORE):
+            break
+        if time.perf_counter() >= deadline:
+            break
+
+    if profile is not None:
+        profile.finish()
+    return best_col, best_value, completed_depth
+
+# Nodes needed for a fixed-depth search with each ordering improvement
+# switched on in turn, as (label, nodes, effective branching factor) rows
+def ordering_report(board, depth, maximizingPlayer=True):
+    configurations = [
+        ("center order", dict(table=False, killers=False, history=False)),
+        ("+ table move", dict(table=True, killers=False, history=False)),
+        ("+ killers", dict(table=True, killers=True, history=False)),
+        ("+ history", dict(table=True, killers=True, history=True)),
+    ]
+    rows = []
+    for label, options in configurations:
+        context = SearchContext(TranspositionTable() if options["table"] else None,
+                                killers=options["killers"], history=options["history"])
+        for iteration in range(1, depth + 1):
+            minimax(board, iteration, -math.inf, math.inf, maximizingPlayer, context)
+        rows.append((label, context.nodes, context.nodes ** (1 / depth)))
+    return rows
+
+# Get the best move for the computer within a time budget; pass the same
+# table on every call of a game so earlier searches are reused
+def get_computer_move(board, table=None, time_limit_ms=TIME_LIMIT_MS):
+    col, _, _ = iterative_deepening(board, time_limit_ms, table)
+    return col
+
+# Player whose turn it is, with X moving first
+def side_to_move(board):
+    return PLAYER_PIECE if board.move_count() % 2 == 0 else COMPUTER_PIECE
+
+# Position after a sequence of 0-based columns such as "3342", X moving first
+def position_from_moves(moves):
+    board = create_board()
+    for char in moves:
+        col = int(char) if char.isdigit() else -1
+        if not 0 <= col < COLUMNS or not board.can_play(col) or is_terminal_node(board):
+            raise ValueError(f"illegal move {char!r} in {moves!r}")
+        board.make(col, side_to_move(board))
+    return board
+
+# Outcome of one analysis; score is from the computer's (O's) point of view
+class SearchResult:
+    def __init__(self, column, score, depth, nodes, elapsed, pv, profile=None):
+        self.column = column
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.pv = pv
+        self.profile = profile
+
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        result = {
+            "column": self.column,
+            "score": self.score,
+            "depth": self.depth,
+            "nodes": self.nodes,
+            "elapsed_ms": round(self.elapsed * 1000, 3),
+            "nps": round(self.nodes_per_second()),
+            "pv": self.pv,
+        }
+        if self.profile is not None:
+            result["profile"] = self.profile.summary()
+        return result
+
+# Analyse a position for the side to move (or piece) within a time limit in
+# milliseconds, a depth limit, or both; with neither the default time
+# budget applies. Pass a table to reuse it between analyses, and a
+# SearchProfile to instrument the search
+def analyze(board, time_limit_ms=None, max_depth=None, table=None, piece=None, profile=None):
+    if piece is None:
+        piece = side_to_move(board)
+    if time_limit_ms is None:
+        time_limit_ms = TIME_LIMIT_MS if max_depth is None else math.inf
+    if table is None:
+        table = TranspositionTable()
+    maximizingPlayer = piece == COMPUTER_PIECE
+    stats = SearchStats()
+    col, value, depth = iterative_deepening(board, time_limit_ms, table, max_depth, maximizingPlayer, stats, profile)
+    pv = principal_variation(board, table, maximizingPlayer, depth) if col is not None else []
+    return SearchResult(col, value, depth, stats.nodes, stats.elapsed, pv, profile)
+
+# Non-interactive batch analysis: one position per stdin line, given as
+# 0-based column moves from the empty board ("-" for the empty board
+# itself), and one JSON result per stdout line
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse Connect Four positions read from stdin")
+    parser.add_argument("--time-ms", type=float, help=f"time limit per position (default {TIME_LIMIT_MS} without --depth)")
+    parser.add_argument("--depth", type=int, help="depth limit per position")
+    parser.add_argument("--keep-table", action="store_true", help="share one transposition table across positions")
+    parser.add_argument("--profile", action="store_true", help="add search statistics to every result")
+    parser.add_argument("--trace", help="write a Chrome trace of the searches to this file (implies --profile)")
+    args = parser.parse_args(argv)
+
+    table = TranspositionTable() if args.keep_table else None
+    profiles = []
+    for line in sys.stdin:
+        moves = line.strip()
+        if not moves or moves.startswith("#"):
+            continue
+        if moves == "-":
+            moves = ""
+        try:
+            board = position_from_moves(moves)
+        except ValueError as error:
+            print(json.dumps({"moves": moves, "error": str(error)}), flush=True)
+            continue
+        profile = SearchProfile(moves or "-") if args.profile or args.trace else None
+        result = analyze(board, args.time_ms, args.depth, table, profile=profile)
+        print(json.dumps({"moves": moves, "to_move": side_to_move(board), **result.as_dict()}), flush=True)
+        if profile is not None:
+            profiles.append(profile)
+    if args.trace:
+        write_chrome_trace(profiles, args.trace)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+import argparse
+import math
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from connect_four_engine import (
+    BOARD_MASK, BOTTOM_MASK, CENTER_ORDER, COLUMN_MASKS, TIME_LIMIT_MS, TOP_CELLS, position_from_moves, side_to_move,
+)
+from connect_four_solver import from_board, game_result, winning_cells
+
+# Monte Carlo Tree Search (UCT). Positions use the solver's (position, mask)
+# form: the stones of the player to move and all stones. The tree lives in
+# flat typed arrays indexed by node number; the children of a node are
+# stored next to each other, so a node only needs its first child and a
+# child count. Node values are from the point of view of the player who
+# made the move into the node
+
+EXPLORATION = 1.4  # UCT exploration constant
+BATCH_SIZE = 64  # Leaves rolled out together in one vectorized batch
+MAX_NODES = 1 << 21  # Nodes kept before the tree stops growing
+BENCHMARK_PLAYOUTS = 20000
+BENCHMARK_POSITIONS = ("", "3344", "33332222", "3243312")  # Moves from the empty board
+UNEXPANDED = -1
+ONGOING, WON, DRAWN = 0, 1, 2  # Node states: WON means the move into it won
+
+# Bitboard constants as numpy scalars for the vectorized rollouts
+NP_BOTTOM = np.uint64(BOTTOM_MASK)
+NP_TOP_CELLS = np.array(TOP_CELLS, dtype=np.uint64)
+NP_COLUMN_MASKS = np.array(COLUMN_MASKS, dtype=np.uint64)
+NP_SHIFTS = [(np.uint64(shift), np.uint64(2 * shift)) for shift in (1, 7, 6, 8)]
+
+# Four in a row for every bitboard of an array
+def has_four_array(bitboards):
+    found = np.zeros(len(bitboards), dtype=bool)
+    for shift, double in NP_SHIFTS:
+        pairs = bitboards & (bitboards >> shift)
+        found |= (pairs & (pairs >> double)) != 0
+    return found
+
+# Play random games from every (position, mask) pair at once and return
+# the result for the player to move at the start: 1 win, 0.5 draw, 0 loss
+def rollouts(positions, masks, rng):
+    own = np.array(positions, dtype=np.uint64)
+    mask = np.array(masks, dtype=np.uint64)
+    results = np.full(len(own), 0.5)
+    active = np.arange(len(own))
+    ply = 0
+    while active.size:
+        o, m = own[active], mask[active]
+        playable = (m[:, None] & NP_TOP_CELLS) == 0
+        # A full board is a draw
+        open_games = playable.any(axis=1)
+        active, o, m, playable = active[open_games], o[open_games], m[open_games], playable[open_games]
+        if not active.size:
+            break
+
+        # A random playable column for every game
+        col = (rng.random(playable.shape) * playable).argmax(axis=1)
+        move = (m + NP_BOTTOM) & NP_COLUMN_MASKS[col]
+        won = has_four_array(o | move)
+        results[active[won]] = 1.0 if ply % 2 == 0 else 0.0
+
+        # Hand the move to the other player
+        keep = ~won
+        active = active[keep]
+        own[active] = (o ^ m)[keep]
+        mask[active] = (m | move)[keep]
+        ply += 1
+    return results
+
+class MCTS:
+    def __init__(self, exploration=EXPLORATION, batch_size=BATCH_SIZE, max_nodes=MAX_NODES, seed=None):
+        self.exploration = exploration
+        self.batch_size = batch_size
+        self.max_nodes = max_nodes
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    # Start a new tree; a root whose game is over is a terminal node with no
+    # children
+    def reset(self, position=0, mask=0, moves=()):
+        result = game_result(position, mask, len(moves))
+        self.parent = array("i", [-1])
+        self.first_child = array("i", [UNEXPANDED])
+        self.child_count = array("b", [0])
+        self.column = array("b", [-1])
+        self.state = array("b", [ONGOING if result is None else WON if result else DRAWN])
+        self.visits = array("i", [0])
+        self.values = array("d", [0.0])
+        # Root position and the game moves that led to it
+        self.root_position = position
+        self.root_mask = mask
+        self.root_moves = list(moves)
+        self.playouts = 0
+
+    def node_count(self):
+        return len(self.visits)
+
+    # Create the children of a node; a move that wins at once is the only
+    # child kept, since it is always played
+    def expand(self, node, position, mask):
+        wins = winning_cells(position, mask)
+        playable = (mask + BOTTOM_MASK) & BOARD_MASK
+        children = []
+        for col in CENTER_ORDER:
+            move = playable & COLUMN_MASKS[col]
+            if not move:
+                continue
+            if move & wins:
+                children = [(col, WON)]
+                break
+            children.append((col, DRAWN if mask | move == BOARD_MASK else ONGOING))
+
+        self.first_child[node] = len(self.visits)
+        self.child_count[node] = len(children)
+        for col, state in children:
+            self.parent.append(node)
+            self.first_child.append(UNEXPANDED)
+            self.child_count.append(0)
+            self.column.append(col)
+            self.state.append(state)
+            self.visits.append(0)
+            self.values.append(0.0)
+
+    # UCT child of a node; unvisited children first
+    def select_child(self, node):
+        first = self.first_child[node]
+        visits, values = self.visits, self.values
+        log_parent = math.log(visits[node] + 1)
+        best, best_score = first, -1.0
+        for child in range(first, first + self.child_count[node]):
+            n = visits[child]
+            if n == 0:
+                return child
+            score = values[child] / n + self.exploration * math.sqrt(log_parent / n)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    # Walk from the root to a leaf, expanding it if it was visited before.
+    # Visits along the path are counted at once (a virtual loss), so the
+    # other selections of a batch spread over different leaves
+    def select(self):
+        node, position, mask = 0, self.root_position, self.root_mask
+        path = [0]
+        self.visits[0] += 1
+        while True:
+            if self.state[node] != ONGOING:
+                break
+            if self.first_child[node] == UNEXPANDED:
+                if (self.visits[node] == 1 and node != 0) or len(self.visits) >= self.max_nodes:
+                    break
+                self.expand(node, position, mask)
+            node = self.select_child(node)
+            move = (mask + BOTTOM_MASK) & COLUMN_MASKS[self.column[node]]
+            position, mask = position ^ mask, mask | move
+            path.append(node)
+            self.visits[node] += 1
+        return path, position, mask
+
+    # Add a result, for the player to move at the end of the path, to every
+    # node of the path
+    def backpropagate(self, path, result):
+        values = self.values
+        for node in reversed(path):
+            result = 1.0 - result
+            values[node] += result
+
+    # Run a number of playouts and/or until a deadline; none if the game is
+    # over at the root
+    def run(self, playouts=None, time_limit_ms=None):
+        if self.state[0] != ONGOING:
+            return 0
+        deadline = time.perf_counter() + time_limit_ms / 1000 if time_limit_ms is not None else None
+        done = 0
+        while (playouts is None or done < playouts) and (deadline is None or time.perf_counter() < deadline):
+            batch = self.batch_size if playouts is None else min(self.batch_size, playouts - done)
+            paths, positions, masks = [], [], []
+            for _ in range(batch):
+                path, position, mask = self.select()
+                state = self.state[path[-1]]
+                if state == WON:
+                    # The player to move has just lost
+                    self.backpropagate(path, 0.0)
+                elif state == DRAWN:
+                    self.backpropagate(path, 0.5)
+                else:
+                    paths.append(path)
+                    positions.append(position)
+                    masks.append(mask)
+            if paths:
+                for path, result in zip(paths, rollouts(positions, masks, self.rng)):
+                    self.backpropagate(path, result)
+            done += batch
+        self.playouts += done
+        return done
+
+    # (column, visits, value) of every root move
+    def root_moves_stats(self):
+        first = self.first_child[0]
+        if first == UNEXPANDED:
+            return []
+        return [(self.column[child], self.visits[child], self.values[child])
+                for child in range(first, first + self.child_count[0])]
+
+    # Move the root to the position after the given game moves, keeping the
+    # subtree below it and dropping the rest; returns False if the tree
+    # does not contain those moves
+    def advance(self, moves, position, mask):
+        node = 0
+        for col in moves:
+            first = self.first_child[node]
+            if first == UNEXPANDED:
+                return False
+            children = [child for child in range(first, first + self.child_count[node]) if self.column[child] == col]
+            if not children:
+                return False
+            node = children[0]
+        if node:
+            self.compact(node)
+        self.root_position, self.root_mask = position, mask
+        self.root_moves.extend(moves)
+        return True
+
+    # Copy the subtree under a node to the front of fresh arrays, level by
+    # level, so children stay next to each other
+    def compact(self, root):
+        first = np.frombuffer(self.first_child, dtype=np.int32)
+        count = np.frombuffer(self.child_count, dtype=np.int8).astype(np.int64)
+        levels = [np.array([root])]
+        frontier = levels[0]
+        while frontier.size:
+            frontier = frontier[count[frontier] > 0]
+            starts, counts = first[frontier], count[frontier]
+            offsets = np.repeat(np.cumsum(counts) - counts, counts)
+            frontier = np.arange(counts.sum()) - offsets + np.repeat(starts, counts)
+            levels.append(frontier)
+        order = np.concatenate(levels)
+
+        new_index = np.full(len(first) + 1, -1, dtype=np.int32)  # index -1 maps to -1
+        new_index[order] = np.arange(len(order), dtype=np.int32)
+        parent = new_index[np.frombuffer(self.parent, dtype=np.int32)[order]]
+        parent[0] = -1
+        first_child = np.where(first[order] == UNEXPANDED, UNEXPANDED, new_index[first[order]]).astype(np.int32)
+
+        def take(values, dtype):
+            return array(values.typecode, np.frombuffer(values, dtype=dtype)[order].tobytes())
+
+        self.parent = array("i", parent.tobytes())
+        self.first_child = array("i", first_child.tobytes())
+        self.child_count = take(self.child_count, np.int8)
+        self.column = take(self.column, np.int8)
+        self.state = take(self.state, np.int8)
+        self.visits = take(self.visits, np.int32)
+        self.values = take(self.values, np.float64)
+
+    # Point the root at a game position. When the game went on from the
+    # last root, the subtree of the moves played since is kept
+    def set_root(self, board):
+        position, mask, _ = from_board(board, side_to_move(board))
+        moves = [col for col, _ in board.history]
+        played = len(self.root_moves)
+        if moves[:played] == self.root_moves and self.advance(moves[played:], position, mask):
+            return True
+        self.reset(position, mask, moves)
+        return False
+
+    # Best column for the side to move and its estimated win rate, after a
+    # playout and/or time budget; None if the game is over
+    def search(self, board, playouts=None, time_limit_ms=None, stats=None):
+        if stats is None:
+            stats = MCTSStats()
+        start = time.perf_counter()
+        stats.reused = self.visits[0] if self.set_root(board) else 0
+        stats.playouts = self.run(playouts, time_limit_ms)
+        stats.elapsed = time.perf_counter() - start
+        stats.nodes = self.node_count()
+        return best_root_move(self.root_moves_stats())
+
+    def get_computer_move(self, board, time_limit_ms=TIME_LIMIT_MS):
+        col, _ = self.search(board, time_limit_ms=time_limit_ms)
+        return col
+
+# Most visited root move and its win rate
+def best_root_move(root_moves):
+    if not root_moves:
+        return None, None
+    col, visits, value = max(root_moves, key=lambda move: move[1])
+    return col, value / visits if visits else 0.5
+
+class MCTSStats:
+    def __init__(self):
+        self.playouts = 0
+        self.reused = 0  # Root visits kept from earlier searches
+        self.nodes = 0
+        self.elapsed = 0.0
+
+    def playouts_per_second(self):
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+# Search one independent tree in a worker
+def _search_tree(position, mask, playouts, time_limit_ms, batch_size, seed):
+    tree = MCTS(batch_size=batch_size, seed=seed)
+    tree.reset(position, mask)
+    done = tree.run(playouts, time_limit_ms)
+    return tree.root_moves_stats(), done, tree.node_count()
+
+# Root-parallel MCTS over a process pool: every worker grows its own tree
+# from the same root with its own random seed, and the root visits and
+# values of all trees are summed to choose the move. Trees are not kept
+# between moves, since the pool gives no control over which worker runs
+# which tree
+class RootParallelMCTS:
+    def __init__(self, workers=None, batch_size=BATCH_SIZE, seed=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.seeds = np.random.SeedSequence(seed)
+        self.pool = ProcessPoolExecutor(self.workers)
+
+    def search(self, board, playouts=None, time_limit_ms=None, stats=None):
+        if stats is None:
+            stats = MCTSStats()
+        start = time.perf_counter()
+        position, mask, _ = from_board(board, side_to_move(board))
+        # A playout budget is split between the workers
+        shares = [None] * self.workers if playouts is None else [
+            playouts // self.workers + (index < playouts % self.workers) for index in range(self.workers)]
+        futures = [self.pool.submit(_search_tree, position, mask, share, time_limit_ms, self.batch_size,
+                                    seed.generate_state(1)[0])
+                   for share, seed in zip(shares, self.seeds.spawn(self.workers))]
+
+        totals = {}
+        stats.playouts = stats.nodes = stats.reused = 0
+        for future in futures:
+            root_moves, done, nodes = future.result()
+            stats.playouts += done
+            stats.nodes += nodes
+            for col, visits, value in root_moves:
+                total_visits, total_value = totals.get(col, (0, 0.0))
+                totals[col] = (total_visits + visits, total_value + value)
+        stats.elapsed = time.perf_counter() - start
+        return best_root_move([(col, visits, value) for col, (visits, value) in totals.items()])
+
+    def get_computer_move(self, board, time_limit_ms=TIME_LIMIT_MS):
+        col, _ = self.search(board, time_limit_ms=time_limit_ms)
+        return col
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Playouts per second on a few positions, one leaf at a time against
+# batched rollouts, and with 1..max_workers root-parallel workers
+def benchmark(playouts, max_workers, batch_size=BATCH_SIZE):
+    boards = [position_from_moves(moves) for moves in BENCHMARK_POSITIONS]
+    for label, size in (("unbatched", 1), (f"batch {batch_size}", batch_size)):
+        tree = MCTS(batch_size=size, seed=1)
+        total = MCTSStats()
+        for board in boards:
+            stats = MCTSStats()
+            tree.search(board, playouts, stats=stats)
+            total.playouts += stats.playouts
+            total.elapsed += stats.elapsed
+        print(f"{label:>10}: {total.playouts} playouts in {total.elapsed:.2f}s, "
+              f"{total.playouts_per_second():,.0f} playouts/s")
+
+    for workers in range(2, max_workers + 1):
+        with RootParallelMCTS(workers, batch_size, seed=1) as searcher:
+            # Start the worker processes before timing
+            searcher.search(boards[0], workers)
+            total = MCTSStats()
+            for board in boards:
+                stats = MCTSStats()
+                searcher.search(board, playouts, stats=stats)
+                total.playouts += stats.playouts
+                total.elapsed += stats.elapsed
+        print(f"{workers} workers: {total.playouts} playouts in {total.elapsed:.2f}s, "
+              f"{total.playouts_per_second():,.0f} playouts/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Monte Carlo Tree Search for Connect Four")
+    parser.add_argument("--playouts", type=int, default=BENCHMARK_PLAYOUTS, help="playouts per position")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    benchmark(args.playouts, args.workers, args.batch_size)
@@ -0,0 +1,144 @@
+import argparse
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from connect_four_engine import (
+    COMPUTER_PIECE, PLAYER_PIECE, SearchContext, create_board, get_valid_locations,
+    is_terminal_node, minimax,
+)
+
+# Best root score found so far, shared by every worker process
+_shared_bound = None
+
+def _init_worker(shared_bound):
+    global _shared_bound
+    _shared_bound = shared_bound
+
+# Search one root move in a worker. The replies to the move are searched
+# here rather than in minimax, so the best score any worker has found so
+# far is re-read before each reply and a better root move found meanwhile
+# by another worker tightens the window at once. The window is widened by
+# one so a move that ties the bound still gets an exact score and ties
+# resolve in root order as in serial minimax. A move that cannot beat the
+# bound returns early with a score that is only a bound, which is never
+# chosen
+def _search_root_move(board, col, depth, maximizingPlayer):
+    board.make(col, COMPUTER_PIECE if maximizingPlayer else PLAYER_PIECE)
+    context = SearchContext()
+    if depth == 1 or is_terminal_node(board):
+        _, value = minimax(board, depth - 1, -math.inf, math.inf, not maximizingPlayer, context)
+    elif maximizingPlayer:
+        # The player replies and minimizes
+        context.nodes += 1
+        value = math.inf
+        for reply in context.order_moves(board, get_valid_locations(board), None, 0, 0):
+            alpha = _shared_bound.value - 1
+            if value <= alpha:
+                break
+            board.make(reply, PLAYER_PIECE)
+            value = min(value, minimax(board, depth - 2, alpha, value, True, context, 1)[1])
+            board.unmake()
+    else:
+        # The computer replies and maximizes
+        context.nodes += 1
+        value = -math.inf
+        for reply in context.order_moves(board, get_valid_locations(board), None, 0, 1):
+            beta = _shared_bound.value + 1
+            if value >= beta:
+                break
+            board.make(reply, COMPUTER_PIECE)
+            value = max(value, minimax(board, depth - 2, value, beta, False, context, 1)[1])
+            board.unmake()
+
+    with _shared_bound.get_lock():
+        if maximizingPlayer and value > _shared_bound.value or not maximizingPlayer and value < _shared_bound.value:
+            _shared_bound.value = value
+    return col, value, context.nodes
+
+# Root-splitting search over a process pool. Root moves are farmed out to
+# the workers; with young_brothers_wait the first (eldest) move is searched
+# alone so the others start from its bound, and every worker re-reads the
+# bound between the replies it searches. The chosen column and score
+# are identical to minimax at the same depth without a transposition table
+class ParallelSearcher:
+    def __init__(self, workers=None, young_brothers_wait=True):
+        self.workers = workers or os.cpu_count() or 1
+        self.young_brothers_wait = young_brothers_wait
+        self.shared_bound = multiprocessing.Value("d", 0.0)
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.shared_bound,))
+        self.nodes = 0
+
+    def search(self, board, depth, maximizingPlayer=True):
+        if depth == 0 or is_terminal_node(board):
+            return minimax(board, depth, -math.inf, math.inf, maximizingPlayer)
+
+        # Same root order as serial minimax with a fresh context
+        context = SearchContext()
+        index = 1 if maximizingPlayer else 0
+        ordered = context.order_moves(board, get_valid_locations(board), None, 0, index)
+        self.shared_bound.value = -math.inf if maximizingPlayer else math.inf
+
+        results = {}
+        pending = list(ordered)
+        running = set()
+        if self.young_brothers_wait:
+            eldest = pending.pop(0)
+            running.add(self.pool.submit(_search_root_move, board, eldest, depth, maximizingPlayer))
+            done, running = wait(running)
+            self._collect(done, results)
+        running |= {self.pool.submit(_search_root_move, board, col, depth, maximizingPlayer) for col in pending}
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            self._collect(done, results)
+
+        # First move in root order with the best score, as serial minimax picks
+        values = [results[col] for col in ordered]
+        best_value = max(values) if maximizingPlayer else min(values)
+        return ordered[values.index(best_value)], best_value
+
+    def _collect(self, futures, results):
+        for future in futures:
+            col, value, nodes = future.result()
+            results[col] = value
+            self.nodes += nodes
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Time serial minimax and the parallel search with 1..max_workers workers on
+# the same position, checking that every result matches the serial one
+def benchmark(depth, max_workers, board=None):
+    if board is None:
+        board = create_board()
+    start = time.perf_counter()
+    serial = minimax(board, depth, -math.inf, math.inf, True)
+    serial_time = time.perf_counter() - start
+    print(f"serial    depth {depth}: column {serial[0]} score {serial[1]} in {serial_time:.2f}s")
+
+    for workers in range(1, max_workers + 1):
+        with ParallelSearcher(workers) as searcher:
+            # Start the worker processes before timing
+            searcher.search(board, 2)
+            searcher.nodes = 0
+            start = time.perf_counter()
+            result = searcher.search(board, depth)
+            elapsed = time.perf_counter() - start
+        status = "ok" if result == serial else f"MISMATCH {result}"
+        print(f"{workers} workers depth {depth}: {elapsed:.2f}s, speedup {serial_time / elapsed:.2f}x, "
+              f"{searcher.nodes} nodes, {status}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parallel root splitting for Connect Four")
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    benchmark(args.depth, args.workers)
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from connect_four_engine import (
+    COLUMNS, ROWS, TABLE_SIZE, TIME_LIMIT_MS, TranspositionTable, analyze, position_from_moves, side_to_move,
+)
+from connect_four_solver import OpeningBook, Solver, describe_score, solve_within
+
+# Server configuration constants
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_PENDING = 64  # Requests queued or running before new ones are rejected
+MAX_TIME_MS = 10000  # Largest time budget a request may ask for
+LATENCY_WINDOW = 10000  # Latencies kept for the percentile report
+
+# Transposition table and solver of this worker process, kept across the
+# requests it serves. Each worker has its own tables, which are not shared
+# with the other workers. The opening book is memory-mapped, so the workers
+# do share one copy of it in the page cache
+_table = None
+_solver = None
+
+def _init_worker(table_size, book_path):
+    global _table, _solver
+    _table = TranspositionTable(table_size)
+    _solver = Solver(OpeningBook(book_path) if book_path else None)
+
+# Analyse one position in a worker process. With solve, the solver gets the
+# first part of the time budget and the heuristic search the rest if the
+# proof does not finish
+def _analyze(moves, time_ms, depth, solve):
+    board = position_from_moves(moves)
+    response = {"moves": moves, "to_move": side_to_move(board)}
+    if solve:
+        start = time.perf_counter()
+        solved = solve_within(_solver, board, time_ms)
+        if solved is not None:
+            col, score = solved
+            return {**response, "column": col, "solved": True, "solver_score": score,
+                    "outcome": describe_score(score), "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+        time_ms = max(time_ms - (time.perf_counter() - start) * 1000, 1)
+        response["solved"] = False
+    result = analyze(board, time_ms, depth, _table)
+    return {**response, **result.as_dict()}
+
+# Nearest-rank percentile of a sorted list
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+# Analysis service speaking JSON lines. A request is
+#   {"id": 1, "moves": "3342", "time_ms": 200, "depth": 12, "solve": true}
+# where id, time_ms (positive, capped at MAX_TIME_MS), depth (1 to 42) and
+# solve (try to prove the result first) are optional, and {"cmd": "stats"}
+# reports latency percentiles. Requests of one connection run concurrently
+# and answers carry the request id; past max_pending outstanding requests
+# new ones are answered with an error instead of queueing without bound
+class AnalysisServer:
+    def __init__(self, workers=None, max_pending=MAX_PENDING, table_size=TABLE_SIZE, book_path=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(table_size, book_path))
+        self.max_pending = max_pending
+        self.pending = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    async def handle_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self.handle_line(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line, writer, write_lock):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as error:
+            await self.reply(writer, write_lock, {"error": f"bad request: {error}"})
+            return
+
+        if request.get("cmd") == "stats":
+            await self.reply(writer, write_lock, self.stats())
+        else:
+            response = await self.analyze(request)
+            if "id" in request:
+                response["id"] = request["id"]
+            await self.reply(writer, write_lock, response)
+
+    async def analyze(self, request):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return {"error": "busy", "pending": self.pending}
+
+        try:
+            moves = str(request.get("moves", ""))
+            time_ms = float(request.get("time_ms", TIME_LIMIT_MS))
+            if not math.isfinite(time_ms) or time_ms <= 0:
+                raise ValueError(f"time_ms must be a positive number, got {time_ms}")
+            time_ms = min(time_ms, MAX_TIME_MS)
+            depth = request.get("depth")
+            depth = int(depth) if depth is not None else None
+            if depth is not None and not 1 <= depth <= ROWS * COLUMNS:
+                raise ValueError(f"depth must be between 1 and {ROWS * COLUMNS}, got {depth}")
+            solve = request.get("solve", False)
+            if not isinstance(solve, bool):
+                raise ValueError(f"solve must be true or false, got {solve!r}")
+        except (TypeError, ValueError) as error:
+            return {"error": f"bad request: {error}"}
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self.pool, _analyze, moves, time_ms, depth, solve)
+        except ValueError as error:
+            self.failed += 1
+            return {"error": str(error)}
+        except Exception as error:
+            # A crashed worker (BrokenProcessPool) or a result that cannot be
+            # pickled fails this request, not the connection
+            self.failed += 1
+            return {"error": f"analysis failed: {type(error).__name__}: {error}"}
+        finally:
+            self.pending -= 1
+        latency = (time.perf_counter() - start) * 1000
+        self.latencies.append(latency)
+        self.completed += 1
+        response["latency_ms"] = round(latency, 3)
+        return response
+
+    async def reply(self, writer, write_lock, message):
+        async with write_lock:
+            writer.write((json.dumps(message) + "\n").encode())
+            await writer.drain()
+
+    # Request counters and latency percentiles in milliseconds
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.50), 3),
+                "p90": round(percentile(latencies, 0.90), 3),
+                "p99": round(percentile(latencies, 0.99), 3),
+                "max": round(latencies[-1], 3) if latencies else 0.0,
+            },
+        }
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+async def serve(args):
+    server = AnalysisServer(args.workers, args.max_pending, args.table_size, args.book)
+    try:
+        if args.unix:
+            listener = await asyncio.start_unix_server(server.handle_connection, path=args.unix)
+            print(f"Serving Connect Four analysis on {args.unix}", flush=True)
+        else:
+            listener = await asyncio.start_server(server.handle_connection, args.host, args.port)
+            print(f"Serving Connect Four analysis on {args.host}:{args.port}", flush=True)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Connect Four analysis server (JSON lines)")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    parser.add_argument("--table-size", type=int, default=TABLE_SIZE)
+    parser.add_argument("--book", help="opening book for requests with \"solve\": true")
+    args = parser.parse_args()
+    if args.book:
+        # Fail at startup rather than in every worker
+        try:
+            OpeningBook(args.book).close()
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
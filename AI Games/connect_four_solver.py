@@ -0,0 +1,376 @@
+import argparse
+import mmap
+import struct
+import time
+
+from connect_four_engine import (
+    ROWS, COLUMNS, PLAYER_PIECE, COMPUTER_PIECE, COLUMN_HEIGHT, BOTTOM_MASK, BOARD_MASK, COLUMN_MASKS, CENTER_ORDER, PIECE_INDEX,
+    TIME_LIMIT_MS, SearchTimeout, TranspositionTable, get_computer_move, has_four, position_from_moves, side_to_move,
+)
+
+# Perfect-play solver. Positions are (position, mask, moves): the stones of
+# the player to move, all stones, and the number of stones played, using the
+# same bit layout as connect_four_engine.Position. Scores follow the usual solver
+# convention: positive if the player to move wins, 0 for a draw, negative
+# if they lose, and larger the earlier the win (a win with the last stone
+# is 1)
+
+CELLS = ROWS * COLUMNS
+COLUMN_BITS = (1 << ROWS) - 1
+SOLVER_TABLE_SIZE = (1 << 20) + 7  # Odd size spreads position + mask keys
+SOLVE_SHARE = 0.5  # Part of a move's time budget the solver may spend before the heuristic search takes over
+DEADLINE_CHECK = 1023  # The deadline is checked once per DEADLINE_CHECK + 1 nodes
+BOOK_DEPTH = 2  # Plies past the --from line that build-book solves when --ply is not given
+BOOK_MAGIC = b"C4OB"
+BOOK_HEADER = struct.Struct("<4sBBxxI")  # Magic, version, max ply, entry count
+BOOK_VERSION = 1
+
+# Empty cells that would complete four in a row for the given stones
+def winning_cells(position, mask):
+    # Vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+
+    # Horizontal and both diagonals
+    for shift in (COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1):
+        p = (position << shift) & (position << 2 * shift)
+        r |= p & (position << 3 * shift)
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> 2 * shift)
+        r |= p & (position << shift)
+        r |= p & (position >> 3 * shift)
+
+    return r & (BOARD_MASK ^ mask)
+
+# Cells where the next stone of every column would land
+def playable_cells(mask):
+    return (mask + BOTTOM_MASK) & BOARD_MASK
+
+def can_win_next(position, mask):
+    return bool(winning_cells(position, mask) & playable_cells(mask))
+
+# Score of a finished game for the player to move, or None while it goes on:
+# a loss if the opponent's last stone completed four, a draw if the board
+# is full
+def game_result(position, mask, moves):
+    if has_four(position ^ mask):
+        return -(CELLS // 2 + 1 - (moves + 1) // 2)
+    if mask == BOARD_MASK:
+        return 0
+    return None
+
+# Mirror a bitboard left to right
+def mirror(bits):
+    mirrored = 0
+    for c in range(COLUMNS):
+        column = (bits >> (c * COLUMN_HEIGHT)) & COLUMN_BITS
+        mirrored |= column << ((COLUMNS - 1 - c) * COLUMN_HEIGHT)
+    return mirrored
+
+# Unique key of a position, shared with its mirror image
+def canonical_key(position, mask):
+    return min(position + mask, mirror(position) + mirror(mask))
+
+# Solver input for a game board with the given piece to move
+def from_board(board, piece):
+    return board.bitboards[PIECE_INDEX[piece]], board.mask, board.move_count()
+
+# Read-only opening book: sorted 64-bit canonical keys followed by one
+# signed byte score per key, memory-mapped and binary searched so the
+# book is never loaded onto the heap
+class OpeningBook:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_ply, self.count = BOOK_HEADER.unpack_from(self.data, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            raise ValueError(f"{path} is not a Connect Four opening book")
+        self.keys_offset = BOOK_HEADER.size
+        self.scores_offset = self.keys_offset + 8 * self.count
+        self.hits = 0
+        self.misses = 0
+
+    # Solved score of a position, or None if it is not in the book
+    def lookup(self, position, mask):
+        key = canonical_key(position, mask)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            found = struct.unpack_from("<Q", self.data, self.keys_offset + 8 * middle)[0]
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                self.hits += 1
+                return struct.unpack_from("<b", self.data, self.scores_offset + middle)[0]
+        self.misses += 1
+        return None
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Negamax null-window solver with a transposition table of upper bounds and
+# optional opening book lookups
+class Solver:
+    def __init__(self, book=None, table_size=SOLVER_TABLE_SIZE):
+        self.book = book
+        self.table_size = table_size
+        self.table_keys = [-1] * table_size
+        self.table_values = [0] * table_size
+        self.nodes = 0
+        self.deadline = None
+
+    def reset(self):
+        self.table_keys = [-1] * self.table_size
+        self.nodes = 0
+
+    # Score within [alpha, beta]; assumes the player to move cannot win
+    # with their next stone
+    def negamax(self, position, mask, moves, alpha, beta):
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & DEADLINE_CHECK and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        possible = playable_cells(mask)
+        opponent_win = winning_cells(position ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            # Two threats cannot both be blocked
+            if forced & (forced - 1):
+                return -((CELLS - moves) // 2)
+            possible = forced
+        # Never play directly below an opponent's winning cell
+        non_losing = possible & ~(opponent_win >> 1)
+        if not non_losing:
+            return -((CELLS - moves) // 2)
+        if moves >= CELLS - 2:
+            return 0
+
+        if self.book is not None and moves <= self.book.max_ply:
+            score = self.book.lookup(position, mask)
+            if score is not None:
+                return score
+
+        lowest = -((CELLS - 2 - moves) // 2)
+        if alpha < lowest:
+            alpha = lowest
+            if alpha >= beta:
+                return alpha
+
+        key = position + mask
+        slot = key % self.table_size
+        highest = (CELLS - 1 - moves) // 2
+        if self.table_keys[slot] == key:
+            highest = self.table_values[slot]
+        if beta > highest:
+            beta = highest
+            if alpha >= beta:
+                return beta
+
+        # Center-first, then by how many new threats the move creates
+        candidates = []
+        for col in CENTER_ORDER:
+            move = non_losing & COLUMN_MASKS[col]
+            if move:
+                candidates.append((winning_cells(position | move, mask | move).bit_count(), move))
+        candidates.sort(key=lambda candidate: -candidate[0])
+
+        opponent = position ^ mask
+        for _, move in candidates:
+            score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.table_keys[slot] = key
+        self.table_values[slot] = alpha
+        return alpha
+
+    # Exact score of a position, found by null-window searches that narrow
+    # the score range; weak only tells win (1), draw (0) or loss (-1)
+    def solve(self, position, mask, moves, weak=False):
+        if can_win_next(position, mask):
+            return 1 if weak else (CELLS + 1 - moves) // 2
+        low = -((CELLS - moves) // 2)
+        high = (CELLS + 1 - moves) // 2
+        if weak:
+            low, high = -1, 1
+        while low < high:
+            middle = low + (high - low) // 2
+            if middle <= 0 and int(low / 2) < middle:
+                middle = int(low / 2)
+            elif middle >= 0 and int(high / 2) > middle:
+                middle = int(high / 2)
+            result = self.negamax(position, mask, moves, middle, middle + 1)
+            if result <= middle:
+                high = result
+            else:
+                low = result
+        if weak:
+            return (low > 0) - (low < 0)
+        return low
+
+    # (column, score) of a best move for the player to move; column is None
+    # and score the game_result if the game is already over. With a
+    # deadline (a time.perf_counter() value) the proof raises SearchTimeout
+    # once it passes; the table keeps what was proven for later calls
+    def best_move(self, position, mask, moves, deadline=None):
+        result = game_result(position, mask, moves)
+        if result is not None:
+            return None, result
+        playable = playable_cells(mask)
+        wins = winning_cells(position, mask) & playable
+        for col in CENTER_ORDER:
+            move = playable & COLUMN_MASKS[col]
+            if move & wins:
+                return col, (CELLS + 1 - moves) // 2
+        best_col, best_score = None, None
+        self.deadline = deadline
+        try:
+            for col in CENTER_ORDER:
+                move = playable & COLUMN_MASKS[col]
+                if not move:
+                    continue
+                score = -self.solve(position ^ mask, mask | move, moves + 1)
+                if best_score is None or score > best_score:
+                    best_col, best_score = col, score
+        finally:
+            self.deadline = None
+        return best_col, best_score
+
+# Describe a solver score for the player to move
+def describe_score(score):
+    if score > 0:
+        return f"win with their stone number {CELLS // 2 + 1 - score}"
+    if score < 0:
+        return f"loss, the opponent wins with their stone number {CELLS // 2 + 1 + score}"
+    return "draw"
+
+# Every position up to max_ply plies that the solver can meet, keyed by
+# canonical key: games already won and positions where the player to move
+# wins at once are skipped, as is a root whose game is over. A root
+# (position, mask, moves) restricts the book to one opening line
+def book_positions(max_ply, root=(0, 0, 0)):
+    positions = {}
+
+    def visit(position, mask, moves):
+        if can_win_next(position, mask) or game_result(position, mask, moves) is not None:
+            return
+        key = canonical_key(position, mask)
+        if key in positions:
+            return
+        positions[key] = (position, mask, moves)
+        if moves == max_ply:
+            return
+        for col in range(COLUMNS):
+            move = playable_cells(mask) & COLUMN_MASKS[col]
+            if move:
+                visit(position ^ mask, mask | move, moves + 1)
+
+    visit(*root)
+    return positions
+
+# Solve every position up to max_ply and write them as a book file. Solving
+# the early plies is expensive; this is an offline step
+def build_book(path, max_ply, solver=None, progress=None, root=(0, 0, 0)):
+    if solver is None:
+        solver = Solver()
+    positions = book_positions(max_ply, root)
+    scores = {}
+    # Deepest positions first so their table entries help shallower ones
+    for done, (key, (position, mask, moves)) in enumerate(sorted(positions.items(), key=lambda item: -item[1][2])):
+        scores[key] = solver.solve(position, mask, moves)
+        if progress is not None:
+            progress(done + 1, len(positions))
+
+    keys = sorted(scores)
+    with open(path, "wb") as book_file:
+        book_file.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, max_ply, len(keys)))
+        book_file.write(struct.pack(f"<{len(keys)}Q", *keys))
+        book_file.write(struct.pack(f"<{len(keys)}b", *(scores[key] for key in keys)))
+    return len(keys)
+
+# Best move of a game board for the side to move: proven by the solver if
+# that finishes within SOLVE_SHARE of the time budget, otherwise chosen by
+# the heuristic search in the time left. Returns (column, score) with the
+# solver score, or None if the proof ran out of time
+def solve_within(solver, board, time_limit_ms=TIME_LIMIT_MS):
+    deadline = time.perf_counter() + time_limit_ms * SOLVE_SHARE / 1000
+    try:
+        return solver.best_move(*from_board(board, side_to_move(board)), deadline=deadline)
+    except SearchTimeout:
+        return None
+
+# Computer player for Connect_Four.py: perfect play from the book and
+# wherever the solver finishes in time, the iterative deepening search
+# elsewhere. The solver table and the search table are kept for the game
+class SolverPlayer:
+    def __init__(self, book=None):
+        self.solver = Solver(book)
+        self.table = TranspositionTable()
+
+    def get_computer_move(self, board, time_limit_ms=TIME_LIMIT_MS):
+        start = time.perf_counter()
+        solved = solve_within(self.solver, board, time_limit_ms)
+        if solved is not None:
+            return solved[0]
+        remaining = time_limit_ms - (time.perf_counter() - start) * 1000
+        return get_computer_move(board, self.table, max(remaining, 1))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Connect Four perfect-play solver")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build-book", help="solve every position up to a ply and write a book")
+    build.add_argument("path")
+    build.add_argument("--ply", type=int, help=f"last ply in the book, counted from the empty board "
+                       f"(default: {BOOK_DEPTH} past --from)")
+    build.add_argument("--from", dest="root", default="", help="only positions after this move sequence")
+    solve = commands.add_parser("solve", help="solve the position after a move sequence such as 3342")
+    solve.add_argument("moves", nargs="?", default="")
+    solve.add_argument("--book")
+    args = parser.parse_args()
+
+    if args.command == "build-book":
+        def report(done, total):
+            if done % 100 == 0 or done == total:
+                print(f"\r{done}/{total} positions solved", end="", flush=True)
+        try:
+            board = position_from_moves(args.root)
+        except ValueError as error:
+            parser.error(str(error))
+        root = from_board(board, side_to_move(board))
+        if game_result(*root) is not None:
+            parser.error(f"the game is already over after {args.root!r}")
+        max_ply = args.ply if args.ply is not None else root[2] + BOOK_DEPTH
+        if not root[2] <= max_ply <= CELLS:
+            parser.error(f"--ply must be between {root[2]} and {CELLS}, got {max_ply}")
+        start = time.perf_counter()
+        count = build_book(args.path, max_ply, progress=report, root=root)
+        print(f"\nWrote {count} positions to {args.path} in {time.perf_counter() - start:.1f}s")
+    else:
+        try:
+            board = position_from_moves(args.moves)
+        except ValueError as error:
+            parser.error(str(error))
+        piece = side_to_move(board)
+        book = OpeningBook(args.book) if args.book else None
+        solver = Solver(book)
+        position, mask, moves = from_board(board, piece)
+        result = game_result(position, mask, moves)
+        if result is not None:
+            winner = PLAYER_PIECE if piece == COMPUTER_PIECE else COMPUTER_PIECE
+            print(f"Game over: {winner} has won" if result else "Game over: draw, the board is full")
+        else:
+            start = time.perf_counter()
+            col, score = solver.best_move(position, mask, moves)
+            elapsed = time.perf_counter() - start
+            print(f"{piece} to move: score {score} ({describe_score(score)}), best column {col}")
+            print(f"{solver.nodes} nodes in {elapsed:.2f}s")
@@ -0,0 +1,334 @@
+# Search benchmark for the three game engines. Fixed positions from
+# benchmark_positions/ are searched to fixed depths, so node counts are
+# repeatable and timings comparable between runs; every run is appended to
+# a JSON history file that the compare command checks for regressions
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import chess
+
+import chess_engine
+import connect_four_engine
+from tic_tac_toe_engine import MNKSearch
+
+GAMES = ("tic_tac_toe", "connect_four", "chess")
+CATEGORIES = ("opening", "middlegame", "tactical", "endgame")
+HERE = os.path.dirname(os.path.abspath(__file__))
+POSITIONS_DIR = os.path.join(HERE, "benchmark_positions")
+HISTORY_PATH = os.path.join(HERE, "benchmark_history.json")
+# Fractional drop in nodes per second that counts as a regression
+REGRESSION_THRESHOLD = 0.10
+# Timed runs per position; the fastest is kept to filter out noise
+REPEAT = 3
+
+
+def load_positions(game, categories=None):
+    """
+    Read the position file of a game.
+    Args:
+        game (str): One of GAMES.
+        categories (list): Keep only these categories, or None for all.
+    Returns:
+        list: dicts with category, name, depth and position.
+    """
+    positions = []
+    with open(os.path.join(POSITIONS_DIR, f"{game}.txt")) as file:
+        for number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split(None, 3)
+            if len(fields) != 4 or fields[0] not in CATEGORIES:
+                raise ValueError(f"{game}.txt line {number}: expected 'category name depth position'")
+            category, name, depth, position = fields
+            if categories is None or category in categories:
+                positions.append({"category": category, "name": name, "depth": int(depth), "position": position})
+    return positions
+
+
+def search_tic_tac_toe(position, depth):
+    """
+    Search an m,n,k position such as "3x3k3:XX.OO....".
+    Returns:
+        tuple: (nodes, completed depth, best move).
+    """
+    size, cells = position.split(":")
+    rows, rest = size.split("x")
+    cols, k = rest.split("k")
+    rows, cols, k = int(rows), int(cols), int(k)
+    if len(cells) != rows * cols:
+        raise ValueError(f"{position}: expected {rows * cols} cells")
+    x = sum(1 << i for i, cell in enumerate(cells) if cell == "X")
+    o = sum(1 << i for i, cell in enumerate(cells) if cell == "O")
+    own, opp = (x, o) if cells.count("X") == cells.count("O") else (o, x)
+    searcher = MNKSearch(rows, cols, k)
+    move, _, completed = searcher.search(own, opp, None, depth or None)
+    return searcher.nodes, completed, move
+
+
+def search_connect_four(position, depth):
+    """
+    Search the position after a move sequence ("-" for the empty board).
+    Returns:
+        tuple: (nodes, completed depth, best column).
+    """
+    board = connect_four_engine.position_from_moves("" if position == "-" else position)
+    maximizing = connect_four_engine.side_to_move(board) == connect_four_engine.COMPUTER_PIECE
+    stats = connect_four_engine.SearchStats()
+    col, _, completed = connect_four_engine.iterative_deepening(
+        board, math.inf, connect_four_engine.TranspositionTable(), depth, maximizing, stats)
+    return stats.nodes, completed, col
+
+
+def search_chess(position, depth):
+    """
+    Search a FEN position.
+    Returns:
+        tuple: (nodes, completed depth, best move in UCI notation).
+    """
+    stats = chess_engine.SearchStats()
+    move, _, completed = chess_engine.iterative_deepening(
+        chess.Board(position), math.inf, chess_engine.TranspositionTable(), depth, stats=stats)
+    return stats.nodes, completed, move.uci() if move else None
+
+
+SEARCHES = {"tic_tac_toe": search_tic_tac_toe, "connect_four": search_connect_four, "chess": search_chess}
+
+
+def measure(game, entry, repeat=REPEAT, memory=True):
+    """
+    Benchmark one position. Each search starts from a fresh transposition
+    table. The time is the best of repeat runs; peak memory is measured in
+    a separate run, since tracemalloc slows the search down.
+    Returns:
+        dict: The entry with nodes, depth reached, move, seconds, nodes per
+            second and peak traced memory in KiB (None without memory).
+    """
+    search = SEARCHES[game]
+    seconds = math.inf
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        nodes, completed, move = search(entry["position"], entry["depth"])
+        seconds = min(seconds, time.perf_counter() - start)
+
+    peak_kib = None
+    if memory:
+        tracemalloc.start()
+        try:
+            search(entry["position"], entry["depth"])
+            peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "game": game, **entry, "nodes": nodes, "reached": completed, "move": move, "seconds": seconds,
+        "nps": nodes / seconds if seconds else 0.0, "peak_kib": peak_kib,
+    }
+
+
+def current_commit():
+    """Short hash of the checked-out commit, or None outside a git checkout"""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def run_suite(games=GAMES, categories=None, repeat=REPEAT, memory=True, label=None, progress=None):
+    """
+    Benchmark every position of the given games.
+    Args:
+        games (list): Games to run.
+        categories (list): Position categories to run, or None for all.
+        repeat (int): Timed runs per position.
+        memory (bool): Also measure peak memory.
+        label (str): Free-form name stored with the run.
+        progress (callable): Called with each result as it finishes.
+    Returns:
+        dict: The run, ready for the history file.
+    """
+    results = []
+    for game in games:
+        for entry in load_positions(game, categories):
+            result = measure(game, entry, repeat, memory)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "label": label,
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def summarize(run):
+    """
+    Per-game totals of a run.
+    Returns:
+        dict: game -> dict of positions, nodes, seconds, nps and the largest
+            peak memory in KiB.
+    """
+    totals = {}
+    for result in run["results"]:
+        total = totals.setdefault(result["game"], {"positions": 0, "nodes": 0, "seconds": 0.0, "peak_kib": None})
+        total["positions"] += 1
+        total["nodes"] += result["nodes"]
+        total["seconds"] += result["seconds"]
+        if result["peak_kib"] is not None:
+            total["peak_kib"] = max(total["peak_kib"] or 0.0, result["peak_kib"])
+    for total in totals.values():
+        total["nps"] = total["nodes"] / total["seconds"] if total["seconds"] else 0.0
+    return totals
+
+
+def load_history(path=HISTORY_PATH):
+    """Runs of the history file, oldest first; empty if the file does not exist"""
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_run(run, path=HISTORY_PATH):
+    """Append a run to the history file"""
+    history = load_history(path)
+    history.append(run)
+    with open(path, "w") as file:
+        json.dump(history, file, indent=1)
+    return len(history) - 1
+
+
+def compare(base, new, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare two runs game by game and position by position.
+    Args:
+        base (dict): Earlier run.
+        new (dict): Later run.
+        threshold (float): Fractional nodes-per-second drop that counts as
+            a regression.
+    Returns:
+        tuple: (report lines, regressions) where regressions lists the
+            games whose total throughput dropped beyond threshold. Single
+            positions are too short to time reliably, so their slowdowns
+            are only reported, along with changed node counts and moves,
+            which mean the search itself changed.
+    """
+    lines, regressions = [], []
+
+    def ratio(old, current):
+        return current / old if old else math.inf
+
+    base_totals, new_totals = summarize(base), summarize(new)
+    for game in GAMES:
+        if game not in base_totals or game not in new_totals:
+            continue
+        old, current = base_totals[game], new_totals[game]
+        nps = ratio(old["nps"], current["nps"])
+        flag = nps < 1 - threshold
+        if flag:
+            regressions.append(game)
+        lines.append(f"{game:<13} nps {old['nps']:>10,.0f} -> {current['nps']:>10,.0f} ({nps - 1:+.1%})  "
+                     f"time {old['seconds']:.2f}s -> {current['seconds']:.2f}s  "
+                     f"nodes {old['nodes']} -> {current['nodes']}{'  REGRESSION' if flag else ''}")
+
+    old_results = {(result["game"], result["name"]): result for result in base["results"]}
+    for result in new["results"]:
+        key = (result["game"], result["name"])
+        old = old_results.get(key)
+        if old is None:
+            continue
+        nps = ratio(old["nps"], result["nps"])
+        notes = []
+        if nps < 1 - threshold:
+            notes.append(f"nps {nps - 1:+.1%}")
+        if result["nodes"] != old["nodes"]:
+            notes.append(f"nodes {old['nodes']} -> {result['nodes']}")
+        if result["move"] != old["move"]:
+            notes.append(f"move {old['move']} -> {result['move']}")
+        if notes:
+            lines.append(f"  {'/'.join(key)}: {', '.join(notes)}")
+    return lines, regressions
+
+
+def select_run(history, selector):
+    """A run by index (negative counts from the end) or by label"""
+    try:
+        return history[int(selector)]
+    except ValueError:
+        matches = [run for run in history if run.get("label") == selector]
+        if not matches:
+            raise KeyError(f"no run labelled {selector!r}")
+        return matches[-1]
+
+
+def print_result(result):
+    memory = f"{result['peak_kib']:>9,.0f} KiB" if result["peak_kib"] is not None else ""
+    print(f"{result['game']:<13} {result['category']:<10} {result['name']:<24} depth {result['reached']:>2}/"
+          f"{result['depth'] or 'end':<3} {result['nodes']:>9} nodes {result['seconds']:>7.3f}s {result['nps']:>10,.0f} nps "
+          f"{memory}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the game searches on fixed positions")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSON history file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="benchmark the positions and append the run to the history")
+    run.add_argument("--games", nargs="+", choices=GAMES, default=list(GAMES))
+    run.add_argument("--categories", nargs="+", choices=CATEGORIES)
+    run.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per position; the best counts")
+    run.add_argument("--no-memory", action="store_true", help="skip the peak memory runs")
+    run.add_argument("--label", help="name stored with the run, usable in compare")
+    run.add_argument("--no-save", action="store_true", help="print the results only")
+    check = commands.add_parser("compare", help="compare two runs of the history; exit status 1 on a regression")
+    check.add_argument("base", nargs="?", default="-2", help="index or label of the earlier run (default -2)")
+    check.add_argument("new", nargs="?", default="-1", help="index or label of the later run (default -1)")
+    check.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    commands.add_parser("list", help="list the runs of the history")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        result = run_suite(args.games, args.categories, args.repeat, not args.no_memory, args.label, print_result)
+        for game, total in summarize(result).items():
+            print(f"{game:<13} total {total['positions']} positions, {total['nodes']} nodes in "
+                  f"{total['seconds']:.2f}s, {total['nps']:,.0f} nps")
+        if not args.no_save:
+            index = save_run(result, args.history)
+            print(f"Saved as run {index} in {args.history}")
+        return 0
+
+    history = load_history(args.history)
+    if args.command == "list":
+        for index, run in enumerate(history):
+            games = ", ".join(f"{game} {total['nps']:,.0f} nps" for game, total in summarize(run).items())
+            print(f"{index:>3} {run['timestamp']} {run.get('commit') or '-':<9} {run.get('label') or '':<16} {games}")
+        return 0
+
+    try:
+        base, new = select_run(history, args.base), select_run(history, args.new)
+    except (IndexError, KeyError) as error:
+        print(f"Cannot compare: {error}", file=sys.stderr)
+        return 2
+    lines, regressions = compare(base, new, args.threshold)
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f"{len(regressions)} throughput regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"No throughput regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
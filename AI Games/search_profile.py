@@ -0,0 +1,188 @@
+# Opt-in instrumentation for the Connect Four and chess searches. Every
+# hook in the searches is behind one "profile is not None" test, so a
+# search without a SearchProfile does no extra work beyond those tests
+import json
+import time
+
+# Sections of the time split
+MOVE_GENERATION = "move generation"
+EVALUATION = "evaluation"
+TERMINAL = "terminal checks"
+SECTIONS = (MOVE_GENERATION, EVALUATION, TERMINAL)
+
+
+class SearchProfile:
+    def __init__(self, name="search", clock=time.perf_counter):
+        """
+        Statistics of one search: nodes per ply, cutoffs, calls and time per
+        section, and one record per completed iteration with its principal
+        variation. Timed calls cost two clock reads, so a profiled search
+        runs slower than an unprofiled one; compare profiles with profiles.
+        Args:
+            name (str): Name of the search in logs and traces.
+            clock (callable): Seconds counter.
+        """
+        self.name = name
+        self.clock = clock
+        self.nodes_per_ply = []
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        # Section -> [calls, seconds]
+        self.sections = {section: [0, 0.0] for section in SECTIONS}
+        self.iterations = []
+        self.start = clock()
+        self.end = self.start
+        self.last_iteration = self.start
+        self.last_totals = self.totals()
+
+    def node(self, ply):
+        """Count a node at a distance from the root"""
+        nodes = self.nodes_per_ply
+        while len(nodes) <= ply:
+            nodes.append(0)
+        nodes[ply] += 1
+
+    def timed(self, section, function, *args):
+        """Call function(*args), adding the call and its time to a section"""
+        start = self.clock()
+        result = function(*args)
+        totals = self.sections[section]
+        totals[0] += 1
+        totals[1] += self.clock() - start
+        return result
+
+    def cutoff(self, first_move):
+        """Count a beta cutoff; first_move is True if the first move searched caused it"""
+        self.cutoffs += 1
+        if first_move:
+            self.first_move_cutoffs += 1
+
+    def totals(self):
+        """Running counters, for the differences between iterations"""
+        return {
+            "nodes": sum(self.nodes_per_ply),
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            **{f"{section} calls": calls for section, (calls, _) in self.sections.items()},
+            **{section: seconds for section, (_, seconds) in self.sections.items()},
+        }
+
+    def iteration(self, depth, value, pv):
+        """
+        Record a completed iteration.
+        Args:
+            depth (int): Depth of the iteration.
+            value: Score it returned.
+            pv (list): Principal variation as printable moves.
+        """
+        now = self.clock()
+        totals = self.totals()
+        delta = {key: totals[key] - self.last_totals[key] for key in totals}
+        self.iterations.append({
+            "depth": depth,
+            "value": value,
+            "pv": pv,
+            "start": self.last_iteration - self.start,
+            "elapsed": now - self.last_iteration,
+            "nodes": delta["nodes"],
+            "cutoffs": delta["cutoffs"],
+            "first_move_cutoffs": delta["first_move_cutoffs"],
+            "evaluations": delta[f"{EVALUATION} calls"],
+            "terminal_checks": delta[f"{TERMINAL} calls"],
+            "seconds": {section: delta[section] for section in SECTIONS},
+        })
+        self.last_iteration = self.end = now
+        self.last_totals = totals
+
+    def finish(self):
+        """Mark the end of the search, including any unfinished iteration"""
+        self.end = self.clock()
+
+    def first_move_cutoff_rate(self):
+        """Share of cutoffs caused by the first move searched; high means good move ordering"""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def summary(self):
+        """
+        Returns:
+            dict: JSON-ready totals of the whole search.
+        """
+        elapsed = self.end - self.start
+        seconds = {section: self.sections[section][1] for section in SECTIONS}
+        return {
+            "name": self.name,
+            "elapsed": elapsed,
+            "nodes": sum(self.nodes_per_ply),
+            "nodes_per_ply": list(self.nodes_per_ply),
+            "nodes_per_depth": {iteration["depth"]: iteration["nodes"] for iteration in self.iterations},
+            "cutoffs": self.cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoff_rate(),
+            "evaluations": self.sections[EVALUATION][0],
+            "terminal_checks": self.sections[TERMINAL][0],
+            "seconds": {**seconds, "other": elapsed - sum(seconds.values())},
+            "pv": self.iterations[-1]["pv"] if self.iterations else [],
+        }
+
+    def records(self):
+        """
+        Returns:
+            list: Structured log records, one per iteration and a summary.
+        """
+        return ([{"event": "iteration", "name": self.name, **iteration} for iteration in self.iterations]
+                + [{"event": "search", **self.summary()}])
+
+    def write_log(self, file):
+        """Write the records to a text file as JSON lines"""
+        for record in self.records():
+            file.write(json.dumps(record) + "\n")
+
+
+def chrome_trace(profiles):
+    """
+    Chrome trace of searches, for chrome://tracing, Perfetto or speedscope.
+    Each search is a thread with one slice per iteration; below it, the
+    time of each section within the iteration is shown as one aggregate
+    slice (sections are not contiguous in the search, so only their
+    lengths are meaningful). Node counts are a counter track.
+    Args:
+        profiles (list): SearchProfile objects sharing a clock.
+    Returns:
+        dict: The trace in the Trace Event Format.
+    """
+    events = []
+    origin = min((profile.start for profile in profiles), default=0.0)
+
+    def micros(seconds):
+        return round(seconds * 1e6, 3)
+
+    for tid, profile in enumerate(profiles, 1):
+        base = profile.start - origin
+        events.append({"ph": "M", "name": "thread_name", "pid": 1, "tid": tid, "args": {"name": profile.name}})
+        summary = profile.summary()
+        events.append({"ph": "X", "name": profile.name, "cat": "search", "pid": 1, "tid": tid,
+                       "ts": micros(base), "dur": micros(summary["elapsed"]),
+                       "args": {key: summary[key] for key in ("nodes", "cutoffs", "first_move_cutoff_rate",
+                                                               "evaluations", "pv")}})
+        nodes = 0
+        for iteration in profile.iterations:
+            start = base + iteration["start"]
+            events.append({"ph": "X", "name": f"depth {iteration['depth']}", "cat": "iteration", "pid": 1,
+                           "tid": tid, "ts": micros(start), "dur": micros(iteration["elapsed"]),
+                           "args": {key: iteration[key] for key in ("nodes", "cutoffs", "first_move_cutoffs",
+                                                                     "evaluations", "value", "pv")}})
+            offset = start
+            for section in SECTIONS:
+                seconds = iteration["seconds"][section]
+                events.append({"ph": "X", "name": section, "cat": "section", "pid": 1, "tid": tid,
+                               "ts": micros(offset), "dur": micros(seconds)})
+                offset += seconds
+            nodes += iteration["nodes"]
+            events.append({"ph": "C", "name": f"{profile.name} nodes", "pid": 1, "tid": tid,
+                           "ts": micros(start + iteration["elapsed"]), "args": {"nodes": nodes}})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(profiles, path):
+    """Write chrome_trace(profiles) to a JSON file"""
+    with open(path, "w") as file:
+        json.dump(chrome_trace(profiles), file)
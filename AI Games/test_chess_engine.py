@@ -0,0 +1,58 @@
+# Randomized checks of the incremental Evaluator against a full rescan of
+# the board and python-chess's polyglot hash. Run with: python -m pytest
+import random
+
+import chess
+import chess.polyglot
+
+from chess_engine import TEST_POSITIONS, Evaluator, evaluate
+
+GAMES = 64
+# The test positions plus one where en passant is possible at once
+FENS = [fen for _, fen in TEST_POSITIONS] + ["4k3/8/8/1pPpP3/8/8/8/4K3 w - b6 0 2"]
+STEPS = 150
+NULL_MOVE_RATE = 0.05
+
+def check(evaluator):
+    board = evaluator.board
+    assert evaluator.score == evaluate(board)
+    assert evaluator.key == chess.polyglot.zobrist_hash(board)
+
+# Random games with random take-backs and null moves from every position
+# of FENS, which between them cover castling, en passant and promotions
+def test_incremental_score_and_hash_match_full_recompute():
+    rng = random.Random(2024)
+    for game in range(GAMES):
+        evaluator = Evaluator(chess.Board(FENS[game % len(FENS)]))
+        board = evaluator.board
+        check(evaluator)
+        for _ in range(STEPS):
+            moves = list(board.legal_moves)
+            if evaluator.deltas and (not moves or board.is_game_over() or rng.random() < 0.25):
+                evaluator.pop()
+            elif not moves or board.is_game_over():
+                break
+            elif not board.is_check() and rng.random() < NULL_MOVE_RATE:
+                evaluator.push(chess.Move.null())
+            else:
+                evaluator.push(rng.choice(moves))
+            check(evaluator)
+
+# Popping every move restores the starting score, hash and board
+def test_pop_restores_position():
+    rng = random.Random(7)
+    for fen in FENS:
+        evaluator = Evaluator(chess.Board(fen))
+        board = evaluator.board
+        for _ in range(60):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            evaluator.push(rng.choice(moves))
+        while evaluator.deltas:
+            evaluator.pop()
+        start = Evaluator(chess.Board(fen))
+        assert board.fen() == start.board.fen()
+        assert evaluator.score == start.score
+        assert evaluator.key == start.key
+        assert evaluator.piece_key == start.piece_key
@@ -0,0 +1,78 @@
+# Randomized checks of the incremental Position bookkeeping against the
+# original list-of-lists evaluation. Run with: python -m pytest
+import random
+
+from connect_four_engine import (
+    COLUMNS, COMPUTER_PIECE, EMPTY, PLAYER_PIECE, ROWS, Position, evaluate_window, get_valid_locations,
+    score_position, score_position_rescan,
+)
+
+GAMES = 200
+STEPS = 120
+PIECES = (PLAYER_PIECE, COMPUTER_PIECE)
+
+# Original score_position over a list of rows, row 0 at the top
+def reference_score(grid, piece):
+    score = [grid[r][COLUMNS // 2] for r in range(ROWS)].count(piece) * 6
+    for r in range(ROWS):
+        for c in range(COLUMNS - 3):
+            score += evaluate_window([grid[r][c + i] for i in range(4)], piece)
+    for c in range(COLUMNS):
+        for r in range(ROWS - 3):
+            score += evaluate_window([grid[r + i][c] for i in range(4)], piece)
+    for r in range(ROWS - 3):
+        for c in range(COLUMNS - 3):
+            score += evaluate_window([grid[r + i][c + i] for i in range(4)], piece)
+    for r in range(3, ROWS):
+        for c in range(COLUMNS - 3):
+            score += evaluate_window([grid[r - i][c + i] for i in range(4)], piece)
+    return score
+
+def check(board, grid):
+    for piece in PIECES:
+        expected = reference_score(grid, piece)
+        assert score_position(board, piece) == expected
+        assert score_position_rescan(board, piece) == expected
+    for r in range(ROWS):
+        for c in range(COLUMNS):
+            assert board.cell(r, c) == grid[r][c]
+
+# Random games with random take-backs; every make and unmake must leave the
+# scores equal to a full rescan of the reference grid
+def test_incremental_scores_match_reference():
+    rng = random.Random(2024)
+    for _ in range(GAMES):
+        board = Position()
+        grid = [[EMPTY] * COLUMNS for _ in range(ROWS)]
+        moves = []
+        check(board, grid)
+        for _ in range(STEPS):
+            valid = get_valid_locations(board)
+            if moves and (not valid or rng.random() < 0.25):
+                board.unmake()
+                r, c = moves.pop()
+                grid[r][c] = EMPTY
+            else:
+                col = rng.choice(valid)
+                piece = PIECES[len(moves) % 2]
+                row = max(r for r in range(ROWS) if grid[r][col] == EMPTY)
+                board.make(col, piece)
+                grid[row][col] = piece
+                moves.append((row, col))
+            check(board, grid)
+
+# Undoing every move returns the position to the empty board
+def test_unmake_restores_empty_position():
+    rng = random.Random(7)
+    board = Position()
+    for ply in range(ROWS * COLUMNS):
+        board.make(rng.choice(get_valid_locations(board)), PIECES[ply % 2])
+    while board.history:
+        board.unmake()
+    empty = Position()
+    assert board.bitboards == empty.bitboards
+    assert board.mask == empty.mask
+    assert board.hash == empty.hash
+    assert board.heights == empty.heights
+    assert board.window_codes == empty.window_codes
+    assert board.scores == empty.scores
@@ -0,0 +1,62 @@
+# Solver scores checked against an exhaustive search of positions near the
+# end of random games. Run with: python -m pytest
+import random
+
+from connect_four_engine import (
+    COLUMN_MASKS, COLUMNS, create_board, get_valid_locations, has_four, is_terminal_node, side_to_move,
+)
+from connect_four_solver import CELLS, Solver, from_board, game_result, playable_cells
+
+POSITIONS = 40
+EMPTY_CELLS = 12  # Empty cells left when the exhaustive search starts
+
+# Exact score with the solver's convention, trying every move to the end
+def exhaustive_score(position, mask, moves):
+    if mask.bit_count() == CELLS:
+        return 0
+    children = []
+    for col in range(COLUMNS):
+        move = playable_cells(mask) & COLUMN_MASKS[col]
+        if not move:
+            continue
+        if has_four(position | move):
+            return (CELLS + 1 - moves) // 2
+        children.append(move)
+    return max(-exhaustive_score(position ^ mask, mask | move, moves + 1) for move in children)
+
+# Random positions with EMPTY_CELLS left whose game is still going
+def near_end_positions(rng):
+    positions = []
+    while len(positions) < POSITIONS:
+        board = create_board()
+        while board.move_count() < CELLS - EMPTY_CELLS and not is_terminal_node(board):
+            board.make(rng.choice(get_valid_locations(board)), side_to_move(board))
+        if not is_terminal_node(board):
+            positions.append(from_board(board, side_to_move(board)))
+    return positions
+
+def test_solve_matches_exhaustive_search():
+    solver = Solver()
+    for position, mask, moves in near_end_positions(random.Random(11)):
+        expected = exhaustive_score(position, mask, moves)
+        assert solver.solve(position, mask, moves) == expected
+        assert solver.solve(position, mask, moves, weak=True) == (expected > 0) - (expected < 0)
+
+def test_best_move_reaches_exhaustive_score():
+    solver = Solver()
+    for position, mask, moves in near_end_positions(random.Random(12)):
+        col, score = solver.best_move(position, mask, moves)
+        assert score == exhaustive_score(position, mask, moves)
+        move = playable_cells(mask) & COLUMN_MASKS[col]
+        if has_four(position | move):
+            assert score > 0
+        else:
+            assert -exhaustive_score(position ^ mask, mask | move, moves + 1) == score
+
+def test_finished_games_are_reported():
+    board = create_board()
+    for col in (0, 1, 0, 1, 0, 1, 0):
+        board.make(col, side_to_move(board))
+    position, mask, moves = from_board(board, side_to_move(board))
+    assert game_result(position, mask, moves) < 0
+    assert Solver().best_move(position, mask, moves) == (None, game_result(position, mask, moves))
@@ -0,0 +1,64 @@
+# The raw position tables of the batch harness checked against
+# TicTacToeGame, the code path of the window. Run with: python -m pytest
+import random
+
+from tic_tac_toe_engine import (
+    BEST_MOVES, DRAW, O_WINS, ONGOING, OUTCOMES, X_WINS, TicTacToeGame, play_batch, position_index,
+)
+
+# Every reachable board, X moving first, as (board, player to move)
+def reachable_positions():
+    positions = {}
+
+    def visit(game, player):
+        index = position_index(game.board)
+        if index in positions:
+            return
+        positions[index] = (game.board[:], player)
+        if game.check_winner("X") or game.check_winner("O") or game.is_draw():
+            return
+        for move in game.available_moves():
+            game.make_move(move, player)
+            visit(game, "O" if player == "X" else "X")
+            game.undo_move(move)
+
+    visit(TicTacToeGame(), "X")
+    return positions
+
+def test_tables_match_game():
+    positions = reachable_positions()
+    assert len(positions) == 5478
+    game = TicTacToeGame()
+    for index, (board, _) in positions.items():
+        game.reset()
+        for cell, symbol in enumerate(board):
+            if symbol != " ":
+                game.make_move(cell, symbol)
+        if game.check_winner("X"):
+            assert OUTCOMES[index] == X_WINS
+        elif game.check_winner("O"):
+            assert OUTCOMES[index] == O_WINS
+        elif game.is_draw():
+            assert OUTCOMES[index] == DRAW
+        else:
+            assert OUTCOMES[index] == ONGOING
+            assert BEST_MOVES[index] == game.best_move()
+
+def test_batch_through_game_matches_tables():
+    for mode in ("ai-vs-random", "ai-vs-ai"):
+        for random_rate in (0.0, 0.3):
+            tables = play_batch(2000, mode, random_rate, seed=3)
+            game = play_batch(2000, mode, random_rate, seed=3, through_game=True)
+            for key in ("computer_wins", "draws", "computer_losses"):
+                assert tables[key] == game[key]
+
+def test_perfect_play_never_loses():
+    report = play_batch(2000, "ai-vs-random", 0.0, seed=4, through_game=True)
+    assert report["computer_losses"] == 0
+    assert play_batch(200, "ai-vs-ai", 0.0, seed=4, through_game=True)["draws"] == 200
+
+def test_computer_choice_plays_an_empty_cell():
+    game = TicTacToeGame(random_rate=1.0, rng=random.Random(1))
+    game.make_move(4, "X")
+    for _ in range(100):
+        assert game.computer_choice() in game.available_moves()
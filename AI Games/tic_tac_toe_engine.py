@@ -0,0 +1,587 @@
+# Tic-Tac-Toe game state and AI with no user interface, so the AI can be
+# benchmarked and run without a display
+import argparse
+import functools
+import math
+import random
+import time
+from array import array
+
+from ai_worker import SearchCancelled
+
+# All possible winning lines (rows, cols, diagonals)
+WIN_COMBINATIONS = [
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],  # Rows
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],  # Columns
+    [0, 4, 8], [2, 4, 6]              # Diagonals
+]
+
+# The 8 symmetries of the board (rotations and reflections) as index maps:
+# the transformed board has board[symmetry[i]] at cell i
+SYMMETRIES = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8],  # Identity
+    [6, 3, 0, 7, 4, 1, 8, 5, 2],  # Rotate 90
+    [8, 7, 6, 5, 4, 3, 2, 1, 0],  # Rotate 180
+    [2, 5, 8, 1, 4, 7, 0, 3, 6],  # Rotate 270
+    [2, 1, 0, 5, 4, 3, 8, 7, 6],  # Mirror left-right
+    [6, 7, 8, 3, 4, 5, 0, 1, 2],  # Mirror top-bottom
+    [0, 3, 6, 1, 4, 7, 2, 5, 8],  # Main diagonal
+    [8, 5, 2, 7, 4, 1, 6, 3, 0],  # Anti-diagonal
+]
+
+# Base-3 digit of each cell value in a position index
+CELL_DIGITS = {" ": 0, "X": 1, "O": 2}
+UNSOLVED = 2
+
+
+def position_index(board):
+    """
+    Base-3 index of a board.
+    Args:
+        board (list): 9 cells of " ", "X" or "O".
+    Returns:
+        int: Index in range(3 ** 9).
+    """
+    index = 0
+    for cell in reversed(board):
+        index = index * 3 + CELL_DIGITS[cell]
+    return index
+
+
+def canonical_position(board):
+    """
+    Find the symmetric image of a board with the smallest index.
+    Args:
+        board (list): 9 cells of " ", "X" or "O".
+    Returns:
+        tuple: (index, symmetry) of the canonical image.
+    """
+    return min((position_index([board[i] for i in symmetry]), symmetry) for symmetry in SYMMETRIES)
+
+
+def is_winner(board, player):
+    """Check if the specified player has a winning line on a board"""
+    return any(all(board[i] == player for i in combo) for combo in WIN_COMBINATIONS)
+
+
+def build_solution_table():
+    """
+    Solve every position reachable with X moving first, once per symmetry class.
+    Returns:
+        tuple: (values, optimal_moves) arrays indexed by canonical position index.
+            values holds the minimax score (+1 computer O wins, -1 player X
+            wins, 0 draw) and optimal_moves a 9-bit mask of the moves that
+            reach it, in the canonical orientation.
+    """
+    values = array("b", [UNSOLVED]) * 3 ** 9
+    optimal_moves = array("H", [0]) * 3 ** 9
+
+    def solve(board):
+        index, symmetry = canonical_position(board)
+        if values[index] != UNSOLVED:
+            return values[index]
+        canonical = [board[i] for i in symmetry]
+
+        if is_winner(canonical, "O"):
+            values[index] = 1
+        elif is_winner(canonical, "X"):
+            values[index] = -1
+        elif " " not in canonical:
+            values[index] = 0
+        else:
+            # X always moves first, so equal counts mean it is X's turn
+            player = "X" if canonical.count("X") == canonical.count("O") else "O"
+            scores = {}
+            for move in range(9):
+                if canonical[move] == " ":
+                    canonical[move] = player
+                    scores[move] = solve(canonical)
+                    canonical[move] = " "
+            best = max(scores.values()) if player == "O" else min(scores.values())
+            values[index] = best
+            optimal_moves[index] = sum(1 << move for move, score in scores.items() if score == best)
+        return values[index]
+
+    solve([" "] * 9)
+    return values, optimal_moves
+
+
+# Game values of all reachable positions, built once at import
+SOLUTION_VALUES, OPTIMAL_MOVES = build_solution_table()
+
+# Chance that the computer plays a random move instead of the best one
+RANDOM_MOVE_RATE = 0.3
+POWERS = [3 ** i for i in range(9)]
+# Outcome codes of the raw position tables
+ONGOING, X_WINS, O_WINS, DRAW = 0, 1, 2, 3
+
+
+def build_move_tables():
+    """
+    Expand the symmetry-reduced solution to every reachable raw position.
+    Returns:
+        tuple: (best_moves, outcomes) arrays indexed by position_index.
+            best_moves holds the move best_move would return (-1 where the
+            game is over) and outcomes one of ONGOING, X_WINS, O_WINS, DRAW.
+    """
+    best_moves = array("b", [-1]) * 3 ** 9
+    outcomes = array("b", [ONGOING]) * 3 ** 9
+    seen = set()
+
+    def visit(board, player):
+        index = position_index(board)
+        if index in seen:
+            return
+        seen.add(index)
+        if is_winner(board, "X"):
+            outcomes[index] = X_WINS
+        elif is_winner(board, "O"):
+            outcomes[index] = O_WINS
+        elif " " not in board:
+            outcomes[index] = DRAW
+        else:
+            canonical_index, symmetry = canonical_position(board)
+            mask = OPTIMAL_MOVES[canonical_index]
+            best_moves[index] = min(symmetry[move] for move in range(9) if mask >> move & 1)
+            for move in range(9):
+                if board[move] == " ":
+                    board[move] = player
+                    visit(board, "O" if player == "X" else "X")
+                    board[move] = " "
+
+    visit([" "] * 9, "X")
+    return best_moves, outcomes
+
+
+BEST_MOVES, OUTCOMES = build_move_tables()
+
+# Search limits for boards other than 3x3, where the table does not apply
+SEARCH_TIME_MS = 1000
+WIN_SCORE = 1000000000
+# Empty cells within this distance of a stone are searched on large boards
+NEIGHBOUR_DISTANCE = 2
+
+
+@functools.lru_cache(maxsize=None)
+def win_lines(rows, cols, k):
+    """
+    Bitmasks of every k-in-a-row line on a rows x cols board.
+    Args:
+        rows (int): Board height.
+        cols (int): Board width.
+        k (int): Stones in a row needed to win.
+    Returns:
+        tuple: (lines, cell_lines) where cell_lines[i] holds the lines
+            through cell i (cell i is bit i, numbered row by row).
+    """
+    lines = []
+    for r in range(rows):
+        for c in range(cols):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                if 0 <= end_r < rows and 0 <= end_c < cols:
+                    lines.append(sum(1 << ((r + dr * i) * cols + c + dc * i) for i in range(k)))
+    cell_lines = tuple(tuple(line for line in lines if line >> cell & 1) for cell in range(rows * cols))
+    return tuple(lines), cell_lines
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when its deadline has passed"""
+
+
+class MNKSearch:
+    def __init__(self, rows, cols, k):
+        """
+        Alpha-beta search for k-in-a-row on a rows x cols board.
+        Positions are two bitmasks: the stones of the side to move and the
+        stones of its opponent. Non-terminal cutoffs use a heuristic that
+        scores every line still open to only one side.
+        Args:
+            rows (int): Board height.
+            cols (int): Board width.
+            k (int): Stones in a row needed to win.
+        """
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+        self.lines, self.cell_lines = win_lines(rows, cols, k)
+        # Weight of an open line by the number of stones in it
+        self.line_weights = [0] + [4 ** count for count in range(1, k + 1)]
+        center_r, center_c = (rows - 1) / 2, (cols - 1) / 2
+        self.center_order = sorted(range(self.size), key=lambda i: abs(i // cols - center_r) + abs(i % cols - center_c))
+        # Large boards only search cells near existing stones
+        self.neighbours = None
+        if self.size > 16:
+            self.neighbours = [
+                sum(1 << (rr * cols + cc)
+                    for rr in range(max(0, r - NEIGHBOUR_DISTANCE), min(rows, r + NEIGHBOUR_DISTANCE + 1))
+                    for cc in range(max(0, c - NEIGHBOUR_DISTANCE), min(cols, c + NEIGHBOUR_DISTANCE + 1)))
+                for r in range(rows) for c in range(cols)
+            ]
+        self.deadline = None
+        self.cancel_event = None
+        self.nodes = 0
+
+    def evaluate(self, own, opp):
+        """
+        Heuristic score of a position for the side to move.
+        Args:
+            own (int): Stones of the side to move.
+            opp (int): Stones of the opponent.
+        Returns:
+            int: Sum of own open-line weights minus the opponent's.
+        """
+        weights = self.line_weights
+        score = 0
+        for line in self.lines:
+            mine = own & line
+            theirs = opp & line
+            if mine and not theirs:
+                score += weights[mine.bit_count()]
+            elif theirs and not mine:
+                score -= weights[theirs.bit_count()]
+        return score
+
+    def candidates(self, own, opp):
+        """Empty cells worth searching, nearest to the center first"""
+        occupied = own | opp
+        empty = self.full & ~occupied
+        if self.neighbours is not None and occupied:
+            near = 0
+            for cell in range(self.size):
+                if occupied >> cell & 1:
+                    near |= self.neighbours[cell]
+            empty &= near
+        return [cell for cell in self.center_order if empty >> cell & 1]
+
+    def negamax(self, own, opp, depth, alpha, beta, ply, last_move):
+        """
+        Alpha-beta negamax score of a position for the side to move.
+        Args:
+            own (int): Stones of the side to move.
+            opp (int): Stones of the opponent, who played last_move.
+            depth (int): Remaining depth.
+            alpha (int): Lower bound of the search window.
+            beta (int): Upper bound of the search window.
+            ply (int): Distance from the root, so faster wins score higher.
+            last_move (int): Cell of the opponent's last stone, or None.
+        Returns:
+            int: Score for the side to move.
+        """
+        self.nodes += 1
+        if self.nodes & 255 == 0:
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise SearchCancelled()
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
+
+        if last_move is not None and any(opp & line == line for line in self.cell_lines[last_move]):
+            return -(WIN_SCORE - ply)
+        if (own | opp) == self.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(own, opp)
+
+        best = -math.inf
+        for cell in self.candidates(own, opp):
+            score = -self.negamax(opp, own | 1 << cell, depth - 1, -beta, -alpha, ply + 1, cell)
+            if score > best:
+                best = score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return best
+
+    def search(self, own, opp, time_limit_ms=SEARCH_TIME_MS, max_depth=None, cancel_event=None):
+        """
+        Iterative deepening alpha-beta search under a time and depth limit.
+        Args:
+            own (int): Stones of the side to move.
+            opp (int): Stones of the opponent.
+            time_limit_ms (float): Time budget; depth 1 always completes.
+            max_depth (int): Depth limit, or None for no limit.
+            cancel_event (threading.Event): Raises SearchCancelled once set.
+        Returns:
+            tuple: (move, score, depth) of the deepest completed iteration.
+        """
+        self.cancel_event = cancel_event
+        empties = self.size - (own | opp).bit_count()
+        if max_depth is None or max_depth > empties:
+            max_depth = empties
+        start = time.perf_counter()
+        self.nodes = 0
+        best_move, best_score, completed = None, 0, 0
+        root_moves = self.candidates(own, opp)
+
+        for depth in range(1, max_depth + 1):
+            self.deadline = start + time_limit_ms / 1000 if depth > 1 and time_limit_ms is not None else None
+            alpha, move = -math.inf, root_moves[0]
+            try:
+                for cell in root_moves:
+                    score = -self.negamax(opp, own | 1 << cell, depth - 1, -math.inf, -alpha, 1, cell)
+                    if score > alpha:
+                        alpha, move = score, cell
+            except SearchTimeout:
+                break
+            best_move, best_score, completed = move, alpha, depth
+            # Search the best move first in the next iteration
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if abs(best_score) >= WIN_SCORE - max_depth:
+                break
+
+        self.deadline = None
+        return best_move, best_score, completed
+
+
+class TicTacToeGame:
+    def __init__(self, random_rate=RANDOM_MOVE_RATE, rng=None, rows=3, cols=3, k=3, time_limit_ms=SEARCH_TIME_MS,
+                 max_depth=None):
+        """
+        Initialize an empty game; the player is X and moves first.
+        Args:
+            random_rate (float): Chance the computer plays a random move.
+            rng (random.Random): Source of the random moves.
+            rows (int): Board height.
+            cols (int): Board width.
+            k (int): Stones in a row needed to win.
+            time_limit_ms (float): Search budget per move off the 3x3 board.
+            max_depth (int): Search depth limit off the 3x3 board.
+        """
+        self.rows, self.cols, self.k = rows, cols, k
+        self.size = rows * cols
+        self.board = [" " for _ in range(self.size)]
+        # Stones of each side as bitmasks, cell i is bit i
+        self.bits = {"X": 0, "O": 0}
+        self.lines, _ = win_lines(rows, cols, k)
+        # Player and computer symbols
+        self.player = "X"
+        self.computer = "O"
+        self.random_rate = random_rate
+        self.rng = rng or random.Random()
+        self.time_limit_ms = time_limit_ms
+        self.max_depth = max_depth
+        self.searcher = None
+
+    def make_move(self, index, player):
+        """
+        Make a move for the given player at the given index.
+        Args:
+            index (int): Position to play.
+            player (str): 'X' for player, 'O' for computer.
+        """
+        self.board[index] = player
+        self.bits[player] |= 1 << index
+
+    def undo_move(self, index):
+        """
+        Clear a cell played with make_move.
+        Args:
+            index (int): Position to clear.
+        """
+        self.bits[self.board[index]] &= ~(1 << index)
+        self.board[index] = " "
+
+    def is_draw(self):
+        """Check if the board is full and there's no winner (draw)"""
+        return " " not in self.board
+
+    def check_winner(self, player):
+        """
+        Check if the specified player has won.
+        Args:
+            player (str): 'X' or 'O'
+        Returns:
+            bool: True if the player wins
+        """
+        bits = self.bits[player]
+        return any(bits & line == line for line in self.lines)
+
+    def available_moves(self):
+        """Return a list of indices for empty cells (valid moves)"""
+        return [i for i, spot in enumerate(self.board) if spot == " "]
+
+    def computer_choice(self, cancel_event=None):
+        """
+        Choose the computer's move:
+        - random_rate chance to play a random move (makes it beatable).
+        - Otherwise the best move from the precomputed minimax table.
+        Args:
+            cancel_event (threading.Event): Cancels a running search.
+        Returns:
+            int: Cell to play.
+        """
+        if self.rng.random() < self.random_rate:
+            # Make a random move (simulate imperfect AI)
+            return self.rng.choice(self.available_moves())
+        return self.best_move(cancel_event)
+
+    def best_move(self, cancel_event=None):
+        """
+        Best move for the side to move: a table lookup on the 3x3 board,
+        otherwise a time-limited alpha-beta search.
+        Args:
+            cancel_event (threading.Event): Cancels a running search.
+        Returns:
+            int: On 3x3, the lowest-numbered optimal cell, the move a full
+                Minimax search would choose.
+        """
+        if (self.rows, self.cols, self.k) != (3, 3, 3):
+            return self.search(cancel_event)[0]
+        index, symmetry = canonical_position(self.board)
+        mask = OPTIMAL_MOVES[index]
+        # Map the optimal moves back from the canonical orientation
+        return min(symmetry[move] for move in range(9) if mask >> move & 1)
+
+    def search(self, cancel_event=None):
+        """
+        Run the alpha-beta search for the side to move.
+        Args:
+            cancel_event (threading.Event): Cancels the search.
+        Returns:
+            tuple: (move, score, depth) from MNKSearch.search.
+        """
+        if self.searcher is None:
+            self.searcher = MNKSearch(self.rows, self.cols, self.k)
+        x_to_move = self.board.count("X") == self.board.count("O")
+        own, opp = (self.bits["X"], self.bits["O"]) if x_to_move else (self.bits["O"], self.bits["X"])
+        return self.searcher.search(own, opp, self.time_limit_ms, self.max_depth, cancel_event)
+
+    def minimax(self, depth, is_maximizing):
+        """
+        Minimax algorithm: evaluates the best move recursively.
+        Args:
+            depth (int): Recursion depth.
+            is_maximizing (bool): True if computer's turn, False if player's.
+        Returns:
+            int: Score for the current board state.
+        """
+        if self.check_winner(self.computer):
+            return 1
+        elif self.check_winner(self.player):
+            return -1
+        elif self.is_draw():
+            return 0
+
+        if is_maximizing:
+            best_score = -math.inf
+            for move in self.available_moves():
+                self.make_move(move, self.computer)
+                score = self.minimax(depth + 1, False)
+                self.undo_move(move)
+                best_score = max(score, best_score)
+            return best_score
+        else:
+            best_score = math.inf
+            for move in self.available_moves():
+                self.make_move(move, self.player)
+                score = self.minimax(depth + 1, True)
+                self.undo_move(move)
+                best_score = min(score, best_score)
+            return best_score
+
+    def reset(self):
+        """Clear the board for a new round"""
+        self.board = [" " for _ in range(self.size)]
+        self.bits = {"X": 0, "O": 0}
+
+
+def play_game(game, x_uses_ai):
+    """
+    Play one headless game through TicTacToeGame, the code path of the
+    window: computer_choice for the AI sides and a random empty cell for
+    a random X, drawing from game.rng in the same order as play_batch.
+    Args:
+        game (TicTacToeGame): Game to reset and play.
+        x_uses_ai (bool): X uses the computer's policy too.
+    Returns:
+        int: X_WINS, O_WINS or DRAW.
+    """
+    game.reset()
+    player = "X"
+    while True:
+        if player == "O" or x_uses_ai:
+            move = game.computer_choice()
+        else:
+            move = game.rng.choice(game.available_moves())
+        game.make_move(move, player)
+        if game.check_winner(player):
+            return X_WINS if player == "X" else O_WINS
+        if game.is_draw():
+            return DRAW
+        player = "O" if player == "X" else "X"
+
+
+def play_batch(games, mode="ai-vs-random", random_rate=RANDOM_MOVE_RATE, seed=None, through_game=False):
+    """
+    Play many headless games with X moving first and the computer as O.
+    Args:
+        games (int): Number of games.
+        mode (str): "ai-vs-random" (X plays uniformly random moves) or
+            "ai-vs-ai" (both sides use the computer's policy).
+        random_rate (float): Chance an AI side plays a random move.
+        seed (int): Seed for reproducible runs.
+        through_game (bool): Play every move through TicTacToeGame (see
+            play_game) instead of the raw position tables. Much slower,
+            but it tests the code the window uses; with the same seed
+            both give the same results.
+    Returns:
+        dict: Computer wins, draws and losses, elapsed seconds and games/s.
+    """
+    if mode not in ("ai-vs-random", "ai-vs-ai"):
+        raise ValueError(f"unknown mode {mode!r}")
+    rng = random.Random(seed)
+    rand, choice = rng.random, rng.choice
+    x_uses_ai = mode == "ai-vs-ai"
+    best_moves, outcomes, powers = BEST_MOVES, OUTCOMES, POWERS
+    counts = [0, 0, 0, 0]
+    game = TicTacToeGame(random_rate, rng) if through_game else None
+
+    start = time.perf_counter()
+    for _ in range(games):
+        if through_game:
+            counts[play_game(game, x_uses_ai)] += 1
+            continue
+        index = 0
+        empty = list(range(9))
+        digit = 1  # X to move
+        while True:
+            if (digit == 2 or x_uses_ai) and rand() >= random_rate:
+                move = best_moves[index]
+            else:
+                move = choice(empty)
+            empty.remove(move)
+            index += digit * powers[move]
+            outcome = outcomes[index]
+            if outcome:
+                counts[outcome] += 1
+                break
+            digit = 3 - digit
+    elapsed = time.perf_counter() - start
+
+    return {
+        "games": games,
+        "mode": mode,
+        "computer_wins": counts[O_WINS],
+        "draws": counts[DRAW],
+        "computer_losses": counts[X_WINS],
+        "elapsed": elapsed,
+        "games_per_second": games / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Tic-Tac-Toe AI regression and throughput run")
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument("--mode", choices=["ai-vs-random", "ai-vs-ai"], default="ai-vs-random")
+    parser.add_argument("--random-rate", type=float, default=RANDOM_MOVE_RATE)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--through-game", action="store_true",
+                        help="play every move through TicTacToeGame, as the window does (much slower)")
+    args = parser.parse_args()
+
+    report = play_batch(args.games, args.mode, args.random_rate, args.seed, args.through_game)
+    games = report["games"]
+    print(f"{games} games ({report['mode']}) in {report['elapsed']:.2f}s: {report['games_per_second']:,.0f} games/s")
+    print(f"Computer wins {report['computer_wins'] / games:.2%}, draws {report['draws'] / games:.2%}, "
+          f"losses {report['computer_losses'] / games:.2%}")